@@ -1,4 +1,8 @@
 import os
+import sys
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 from tqdm.auto import tqdm
@@ -15,6 +19,11 @@ from sklearn.ensemble import GradientBoostingClassifier
 from xgboost import XGBClassifier
 from catboost import CatBoostClassifier
 import lightgbm as lgb
+from threadpoolctl import threadpool_limits
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from categorical_encoder import CategoricalEncoder
+from dataset_loader import read_table
 
 def compute_metric(label, pred, pred_proba=None, n_class=-1, regression=False):
     metric={}
@@ -93,15 +102,25 @@ def fuc_sampling(mode, X_train, y_train, random_state, cate):
     else:
         raise
         
+@functools.lru_cache(maxsize=None)
+def _read_csv(path, mtime):
+    return read_table(path)
+
+def read_csv_cached(path):
+    """
+    同一进程内每个 CSV 只读取一次（文件修改后重新读取）；返回副本，调用方可以随意修改。
+    跨进程/跨次运行由 dataset_loader 的列式缓存避免重复解析。
+    """
+    path = os.path.abspath(path)
+    return _read_csv(path, os.path.getmtime(path)).copy()
+
 from sklearn.preprocessing import LabelEncoder
 def categorical_variable_encode(configs, X_train, y_train, X_test, y_test, real_data_save_dir):
-    org_X_train = pd.read_csv(os.path.join(real_data_save_dir, f'X_train.csv'), index_col='index').values
-    org_y_train = pd.read_csv(os.path.join(real_data_save_dir, f'y_train.csv'), index_col='index').values
-    org_X_test = pd.read_csv(os.path.join(real_data_save_dir, f'X_test.csv'), index_col='index').values
-    org_y_test = pd.read_csv(os.path.join(real_data_save_dir, f'y_test.csv'), index_col='index').values
-        
-    
-    org_X = np.concatenate([org_X_train, org_X_test, X_train],axis=0)
+    org_X_train = read_csv_cached(os.path.join(real_data_save_dir, f'X_train.csv'))
+    org_y_train = read_csv_cached(os.path.join(real_data_save_dir, f'y_train.csv')).values
+    org_X_test = read_csv_cached(os.path.join(real_data_save_dir, f'X_test.csv'))
+    org_y_test = read_csv_cached(os.path.join(real_data_save_dir, f'y_test.csv')).values
+
     org_y = np.concatenate([org_y_train, org_y_test, y_train],axis=0)
 
     X_columns = X_train.columns
@@ -131,39 +150,34 @@ def categorical_variable_encode(configs, X_train, y_train, X_test, y_test, real_
         
         num_classes = len(le.classes_)
 
-    # Preprocess data
-    X_train = X_train.values
-    X_test = X_test.values
-    
-    for i in range(X_train.shape[1]):
-        if i in cat_idx:
-            le = LabelEncoder()
-            le.fit(org_X[:, i].astype(str))
-            X_train[:, i] = le.transform(X_train[:, i])
-            X_test[:, i] = le.transform(X_test[:, i])
-
-    X_train = pd.DataFrame(X_train, columns=X_columns)
-    X_test = pd.DataFrame(X_test, columns=X_columns)
-    
+    # Preprocess data：取值表覆盖真实 train/test 与本次训练数据（含合成行），所有类别列一次编码。
+    # 每个 (data, synModel) 单独拟合，编码只取决于本次评估的数据；prepare_data 的缓存让同一组数据只拟合一次
+    encoder = CategoricalEncoder().fit([X_columns[i] for i in cat_idx], org_X_train, org_X_test, X_train)
+    X_train = encoder.transform(X_train).reset_index(drop=True)
+    X_test = encoder.transform(X_test).reset_index(drop=True)
+
     return X_train, y_train, X_test, y_test
 
+# 依赖 random_state 的过采样方法，数据不能跨随机种子复用
+SMOTE_MODELS = ['SMOTE', 'SMOTENC', 'SMOTENorg', 'SMOTENCNorg']
+
 def get_data(configs, syn_data_save_dir, real_data_save_dir):
     
-    X_test = pd.read_csv(os.path.join(real_data_save_dir, f'X_test.csv'), index_col='index') 
-    y_test = pd.read_csv(os.path.join(real_data_save_dir, f'y_test.csv'), index_col='index') 
+    X_test = read_csv_cached(os.path.join(real_data_save_dir, f'X_test.csv'))
+    y_test = read_csv_cached(os.path.join(real_data_save_dir, f'y_test.csv'))
     n_org_test = X_test.shape[0]
     
     if configs['synModel'] == 'None':
-        X_train = pd.read_csv(os.path.join(real_data_save_dir, f'X_train.csv'), index_col='index') 
-        y_train = pd.read_csv(os.path.join(real_data_save_dir, f'y_train.csv'), index_col='index') 
+        X_train = read_csv_cached(os.path.join(real_data_save_dir, f'X_train.csv'))
+        y_train = read_csv_cached(os.path.join(real_data_save_dir, f'y_train.csv'))
             
         n_org_train = X_train.shape[0]
         n_syn = 0
         X_train, y_train, X_test, y_test = categorical_variable_encode(configs, X_train, y_train, X_test, y_test,real_data_save_dir)
 
-    elif configs['synModel'] in ['SMOTE', 'SMOTENC', 'SMOTENorg', 'SMOTENCNorg']:
-        X_train = pd.read_csv(os.path.join(real_data_save_dir, f'X_train.csv'), index_col='index') 
-        y_train = pd.read_csv(os.path.join(real_data_save_dir, f'y_train.csv'), index_col='index') 
+    elif configs['synModel'] in SMOTE_MODELS:
+        X_train = read_csv_cached(os.path.join(real_data_save_dir, f'X_train.csv'))
+        y_train = read_csv_cached(os.path.join(real_data_save_dir, f'y_train.csv'))
         n_org_train = X_train.shape[0]
         X_train, y_train, X_test, y_test = categorical_variable_encode(configs, X_train, y_train, X_test, y_test,real_data_save_dir)
 
@@ -180,8 +194,8 @@ def get_data(configs, syn_data_save_dir, real_data_save_dir):
         
     elif configs['synModel'].endswith('Norg'):
         syn_data_save_dir = syn_data_save_dir.replace(configs['synModel'], configs['synModel'].split('Norg')[0])
-        X_train = pd.read_csv(os.path.join(real_data_save_dir, f'X_train.csv'), index_col='index') 
-        y_train = pd.read_csv(os.path.join(real_data_save_dir, f'y_train.csv'), index_col='index') 
+        X_train = read_csv_cached(os.path.join(real_data_save_dir, f'X_train.csv'))
+        y_train = read_csv_cached(os.path.join(real_data_save_dir, f'y_train.csv'))
 
         n_org_train = X_train.shape[0]
         
@@ -194,7 +208,7 @@ def get_data(configs, syn_data_save_dir, real_data_save_dir):
         else:
             n_samples_syn_index = 1000
 
-        samples = pd.read_csv(os.path.join(syn_data_save_dir, f"{configs['data']}_samples.csv"),index_col='synindex')
+        samples = read_csv_cached(os.path.join(syn_data_save_dir, f"{configs['data']}_samples.csv"))
         y_train_sample = pd.DataFrame(samples[configs['target']]).iloc[synSamplingIndex*n_samples_syn_index:synSamplingIndex*n_samples_syn_index+n]
         X_train_sample = samples.drop(columns=[configs['target']]).iloc[synSamplingIndex*n_samples_syn_index:synSamplingIndex*n_samples_syn_index+n]
 
@@ -222,7 +236,7 @@ def get_data(configs, syn_data_save_dir, real_data_save_dir):
         else:
             n_samples_syn_index = 1000
 
-        samples = pd.read_csv(os.path.join(syn_data_save_dir, f"{configs['data']}_samples.csv"),index_col='synindex')
+        samples = read_csv_cached(os.path.join(syn_data_save_dir, f"{configs['data']}_samples.csv"))
         y_train = pd.DataFrame(samples[configs['target']]).iloc[synSamplingIndex*n_samples_syn_index:synSamplingIndex*n_samples_syn_index+n]
         X_train = samples.drop(columns=[configs['target']]).iloc[synSamplingIndex*n_samples_syn_index:synSamplingIndex*n_samples_syn_index+n]
 
@@ -238,20 +252,163 @@ def get_data(configs, syn_data_save_dir, real_data_save_dir):
         
     return X_train, y_train, X_test, y_test, n_syn, n_org_train, n_org_test
 
-def init_models(args, random_state):
-
+_PREPARED = {}
+
+def prepare_data(configs, syn_data_save_dir, real_data_save_dir):
+    """
+    get_data + StandardScaler，返回标准化后的 NumPy 数组、标签与 scaler。
+    编码和标准化与模型、随机种子无关，按 (data, synModel, synSamples, synSamplingIndex) 缓存，
+    网格中每格只需训练；SMOTE 类方法的过采样依赖 random_state，不缓存。
+    """
+    key = (configs['data'], configs['synModel'], configs['synSamples'], configs['synSamplingIndex'],
+           syn_data_save_dir, real_data_save_dir)
+    if key in _PREPARED:
+        return _PREPARED[key]
+
+    X_train, y_train, X_test, y_test, n_syn, n_org_train, n_org_test = get_data(configs, syn_data_save_dir,
+                                                                                real_data_save_dir)
+    scaler = StandardScaler()
+    scaler.fit(X_train)
+    prepared = {
+        'X_train': scaler.transform(X_train),
+        'y_train': y_train,
+        'X_test': scaler.transform(X_test),
+        'y_test': y_test,
+        'scaler': scaler,
+        'n_syn': n_syn,
+        'n_org_train': n_org_train,
+        'n_org_test': n_org_test,
+    }
+    if configs['synModel'] not in SMOTE_MODELS:
+        _PREPARED[key] = prepared
+    return prepared
+
+def available_cpus():
+    # 容器 / taskset 限制下 os.cpu_count() 会高估可用核数
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+@functools.lru_cache(maxsize=None)
+def cuda_device_count():
+    """通过 CUDA 驱动 API 统计可见的 GPU 数（遵循 CUDA_VISIBLE_DEVICES），没有驱动时为 0"""
+    import ctypes
+    import ctypes.util
+    name = ctypes.util.find_library('cuda') or 'libcuda.so.1'
+    try:
+        libcuda = ctypes.CDLL(name)
+    except OSError:
+        return 0
+    count = ctypes.c_int(0)
+    if libcuda.cuInit(0) != 0 or libcuda.cuDeviceGetCount(ctypes.byref(count)) != 0:
+        return 0
+    return count.value
+
+@functools.lru_cache(maxsize=None)
+def detect_device():
+    """
+    XGBoost 使用的设备：xgboost 编译了 CUDA 且能看到 GPU 时为 'cuda'，否则 'cpu'。
+    环境变量 EPIC_DEVICE=cpu/cuda/cuda:<n> 可强制指定。每个进程只检测一次。
+    """
+    forced = os.environ.get('EPIC_DEVICE')
+    if forced:
+        return forced
+    try:
+        import xgboost
+        if xgboost.build_info().get('USE_CUDA') and cuda_device_count() > 0:
+            return 'cuda'
+    except Exception as e:
+        print(f"⚠️ GPU 检测失败，使用 CPU: {e}")
+    return 'cpu'
+
+def init_models(args, random_state, n_threads=None):
+    # n_threads: 每个模型可用的线程数；并行网格中由 run_grid 按进程数分配，None 时使用全部可用核
+    n_threads = n_threads or available_cpus()
+    # GPU 与 CPU 都用直方图算法；CPU 上比默认的 exact / approx 快得多
+    xgb_device = detect_device()
     models = {
 
         'XGBoostClassifier_grid':XGBClassifier(learning_rate=args['xg_lr'],max_depth=args['xg_max_depth'],
-                                              random_state=random_state,device='cuda'), 
+                                              random_state=random_state,device=xgb_device,tree_method='hist',
+                                              n_jobs=n_threads),
         'CatBoostClassifier_grid':CatBoostClassifier(learning_rate=args['cat_lr'], max_depth=args['cat_max_depth'],
-                                          random_state=random_state,verbose=False),
+                                          random_state=random_state,verbose=False,thread_count=n_threads),
         'LGBMClassifier_grid':lgb.LGBMClassifier(learning_rate=args['lgbm_lr'], max_depth=args['lgbm_max_depth'],
-                                          random_state=random_state,verbose_eval=-1,verbose=-1),
+                                          random_state=random_state,verbose_eval=-1,verbose=-1,n_jobs=n_threads),
         'GradientBoostingClassifier':GradientBoostingClassifier(random_state=random_state),
         }
     return models
 
+def run_task(configs, syn_data_save_dir, real_data_save_dir, n_threads=None, skip_data_errors=False):
+    """网格中的一格：configs 中已设置 synModel / model / random_state，返回一行结果"""
+    try:
+        data = prepare_data(configs, syn_data_save_dir, real_data_save_dir)
+    except Exception as e:
+        if not skip_data_errors:
+            raise
+        print(f"⚠️ 数据加载失败 ({configs['synModel']}, {configs['model']}, {configs['random_state']}): {e}")
+        return None
+    df_save = pd.DataFrame([configs])
+    df_save['n_syn'] = data['n_syn']
+    df_save['n_org_train'] = data['n_org_train']
+    df_save['n_org_test'] = data['n_org_test']
+
+    model = init_models(configs, configs['random_state'], n_threads=n_threads)[configs['model']]
+
+    model.fit(data['X_train'], data['y_train'])
+    pred_test = model.predict(data['X_test'])
+    pred_test_proba = model.predict_proba(data['X_test'])
+
+    df_metric = compute_metric(data['y_test'], pred_test, pred_test_proba, configs['n_class'], regression=configs['is_regression'])
+    return pd.concat([df_save, df_metric], axis=1)
+
+_THREAD_LIMITS = None
+
+def _init_grid_worker(n_threads, gpu_counter=None):
+    # OpenMP / BLAS 线程池限制在每进程的配额内，避免 n_workers × 全部核数的超额订阅
+    global _THREAD_LIMITS
+    _THREAD_LIMITS = threadpool_limits(limits=n_threads)
+    if gpu_counter is not None:
+        # 每个进程独占一块 GPU
+        with gpu_counter.get_lock():
+            os.environ['EPIC_DEVICE'] = f'cuda:{gpu_counter.value}'
+            gpu_counter.value += 1
+
+def _run_task(args):
+    return run_task(*args)
+
+def run_grid(tasks, n_workers=None, skip_data_errors=False):
+    """
+    tasks: [(configs, syn_data_save_dir, real_data_save_dir), ...]，每个 configs 是独立的字典
+    在进程池中并行训练，每个进程分到 可用核数 // n_workers 个线程；
+    结果按 tasks 的顺序拼接，与串行执行的顺序一致。n_workers=1 时在当前进程内串行执行。
+    XGBoost 使用 GPU 时进程数不超过 GPU 数，每个进程使用一块 GPU。
+    """
+    n_cpu = available_cpus()
+    n_workers = min(n_workers or n_cpu, len(tasks)) or 1
+    n_gpus = 0
+    if detect_device().startswith('cuda'):
+        n_gpus = max(1, cuda_device_count())
+        n_workers = min(n_workers, n_gpus)
+    n_threads = max(1, n_cpu // n_workers)
+    args = [(configs, syn_dir, real_dir, n_threads if n_workers > 1 else None, skip_data_errors)
+            for configs, syn_dir, real_dir in tasks]
+
+    if n_workers == 1:
+        results = [_run_task(a) for a in tqdm(args)]
+    else:
+        # spawn：父进程已导入 xgboost / lightgbm（OpenMP），fork 后子进程可能死锁
+        ctx = multiprocessing.get_context('spawn')
+        gpu_counter = ctx.Value('i', 0) if n_gpus > 1 and detect_device() == 'cuda' else None
+        with ProcessPoolExecutor(n_workers, mp_context=ctx,
+                                 initializer=_init_grid_worker, initargs=(n_threads, gpu_counter)) as executor:
+            # map 按提交顺序返回；相邻任务（同一 synModel）分到同一进程，便于复用已读取的数据
+            chunksize = max(1, len(args) // (n_workers * 4))
+            results = list(tqdm(executor.map(_run_task, args, chunksize=chunksize), total=len(args)))
+
+    results = [r for r in results if r is not None]
+    return pd.concat(results) if results else pd.DataFrame()
+
 DATA2TARGET = {
     'income':'income',
     'Diabetes':'readmitted',
@@ -301,75 +458,55 @@ ML_PARAMS = {
     }
 }
 
-df_all_result = pd.DataFrame()
-DATA_NAME = 'Sick'
-synSamplingIndex = 0
-n = 1000
-for sM in ['Sick_STPromptNorg']:
-    configs={
-        'data': DATA_NAME,
-        'target':DATA2TARGET[DATA_NAME],
-        'n_class':DATA2NCLASS[DATA_NAME],
-        'is_regression':False,
-
-        # hyperparams
-        'lr_max_iter':ML_PARAMS[DATA_NAME]['lr_max_iter'],
-        'dt_max_depth':ML_PARAMS[DATA_NAME]['dt_max_depth'],
-        'rf_max_depth':ML_PARAMS[DATA_NAME]['rf_max_depth'],
-        'rf_n_estimators':ML_PARAMS[DATA_NAME]['rf_n_estimators'],
-
-        # xgboost
-        'xg_max_depth':4,
-        'xg_lr':0.03,
-
-        # catboost
-        'cat_max_depth':6,
-        'cat_lr':0.003,
-
-        # lightGBM
-        'lgbm_max_depth':3,
-        'lgbm_lr':0.1,
-
-        # synthetic data
-        'synModel':sM,
-        'synSamples':n,
-
-        'synSamplingIndex':synSamplingIndex,
-    }
-    models = init_models(configs, 42)
-    syn_data_save_dir=f"../../data/syndata/{configs['synModel']}"
-    real_data_save_dir=f"../../data/realdata/{configs['data']}"
-
-    for k in tqdm(models.keys()):
-        configs['model']=k    
-        for random_state in range(5):
-            configs['random_state']=random_state
-            X_train, y_train, X_test, y_test, n_syn, n_org_train, n_org_test = get_data(configs, syn_data_save_dir, 
-                                                                                        real_data_save_dir)
-            df_save = pd.DataFrame([configs])
-            df_save['n_syn'] = n_syn
-            df_save['n_org_train']=n_org_train
-            df_save['n_org_test']=n_org_test                
-
-            model = init_models(configs, random_state)[k]
-
-            scaler = StandardScaler()
-            scaler.fit(X_train)
-
-            X_train_np = scaler.transform(X_train)
-            X_test_np = scaler.transform(X_test)
+if __name__ == '__main__':
+    DATA_NAME = 'Sick'
+    synSamplingIndex = 0
+    n = 1000
+    N_WORKERS = None  # 并行训练的进程数，None: 使用全部 CPU 核；1: 串行
+    tasks = []
+    for sM in ['Sick_STPromptNorg']:
+        configs={
+            'data': DATA_NAME,
+            'target':DATA2TARGET[DATA_NAME],
+            'n_class':DATA2NCLASS[DATA_NAME],
+            'is_regression':False,
+
+            # hyperparams
+            'lr_max_iter':ML_PARAMS[DATA_NAME]['lr_max_iter'],
+            'dt_max_depth':ML_PARAMS[DATA_NAME]['dt_max_depth'],
+            'rf_max_depth':ML_PARAMS[DATA_NAME]['rf_max_depth'],
+            'rf_n_estimators':ML_PARAMS[DATA_NAME]['rf_n_estimators'],
+
+            # xgboost
+            'xg_max_depth':4,
+            'xg_lr':0.03,
+
+            # catboost
+            'cat_max_depth':6,
+            'cat_lr':0.003,
+
+            # lightGBM
+            'lgbm_max_depth':3,
+            'lgbm_lr':0.1,
+
+            # synthetic data
+            'synModel':sM,
+            'synSamples':n,
+
+            'synSamplingIndex':synSamplingIndex,
+        }
+        models = init_models(configs, 42)
+        syn_data_save_dir=f"../../data/syndata/{configs['synModel']}"
+        real_data_save_dir=f"../../data/realdata/{configs['data']}"
 
-            model.fit(X_train_np, y_train)
-            pred_test = model.predict(X_test_np)
-            pred_test_proba = model.predict_proba(X_test_np)
+        # (synModel × model × random_state) 网格
+        for k in models.keys():
+            for random_state in range(5):
+                tasks.append((dict(configs, model=k, random_state=random_state), syn_data_save_dir, real_data_save_dir))
 
-            df_metric = compute_metric(y_test, pred_test, pred_test_proba, configs['n_class'], regression=configs['is_regression'])
+    df_all_result = run_grid(tasks, n_workers=N_WORKERS)
 
-            df_save = pd.concat([df_save, df_metric], axis=1)
-            df_all_result= pd.concat([df_all_result, df_save.copy()])
-            
-            
-df = df_all_result[['data','model','synModel','F1','BalancedACC']]
-df = (df.groupby(['data','model','synModel']).mean()*100).reset_index()
+    df = df_all_result[['data','model','synModel','F1','BalancedACC']]
+    df = (df.groupby(['data','model','synModel']).mean()*100).reset_index()
 
-print(tabulate(df, headers='keys', tablefmt='psql'))
+    print(tabulate(df, headers='keys', tablefmt='psql'))
@@ -0,0 +1,260 @@
+"""
+异步并发生成引擎
+作用：用 asyncio 驱动 `template | llm | output_parser` 链（ainvoke），
+      以可配置的并发请求数替代 `llm1.batch(...)` + `time.sleep(60)` 的串行循环。
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from rate_limiter import estimate_tokens
+from batch_controller import YieldController
+
+
+class NonRetryableError(Exception):
+    """抛出该异常的请求不做重试，直接记为失败（例如 replay 模式下缓存未命中）"""
+
+
+@dataclass
+class GenerationJob:
+    """一次 LLM 请求：渲染后的 prompt 文本 + 模板输入；job_id 在一次运行内唯一，重试时不变"""
+    prompt_text: str
+    inputs: dict
+    attempt: int = 0
+    job_id: int = 0
+    extra: dict = field(default_factory=dict)
+
+
+class AsyncGenerationEngine:
+    """
+    make_batch()            -> (final_prompt, inputs_batch)，与 util.make_final_prompt 返回值一致
+    on_response(job, text)  -> 本次响应被接受的行数（解析/过滤后）
+    on_error(job, exc)      -> 请求在重试后仍失败时的回调（可选）
+    rate_limiter            -> rate_limiter.RateLimiter，每次请求前按 RPM/TPM 预算等待（可选）
+    stream_parser_factory(job, n_remaining) -> stream_parser.StreamingRowParser（可选）
+                              给定时改用 chain.astream 边接收边解析，解析器放在 job.extra['parser']；
+                              有效行够数或整体目标已达成时提前结束该请求
+    controller              -> batch_controller.YieldController（可选，默认按目标自动创建）
+                              按每请求的有效行产出决定是否还需要派发；adaptive=False 时满并发派发
+    parse_fn(prompt_text, text) -> 在 parse_executor（parse_pool.make_parse_executor）中执行的解析函数（可选），
+                              结果放在 job.extra['parsed']，解析期间其他请求照常收发
+    endpoint_pool           -> endpoint_pool.EndpointPool（可选）
+                              给定时每次请求（含重试）从池中选端点，使用该端点的 chain 与限流器，
+                              chain / rate_limiter 参数不再使用；端点名放在 job.extra['endpoint']
+
+    当累计接受行数 >= n_target 时停止派发新请求，并取消仍在途的请求（cancel_inflight=True）。
+    """
+
+    def __init__(self, chain, make_batch, on_response, n_target, max_concurrency=8,
+                 max_retries=3, retry_backoff=2.0, max_consecutive_failures=10,
+                 on_error=None, n_accepted=0, rate_limiter=None, completion_tokens=1024,
+                 stream_parser_factory=None, controller=None, adaptive=True, cancel_inflight=True,
+                 parse_fn=None, parse_executor=None, endpoint_pool=None):
+        self.chain = chain
+        self.make_batch = make_batch
+        self.on_response = on_response
+        self.on_error = on_error
+        self.n_target = n_target
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_consecutive_failures = max_consecutive_failures
+        self.rate_limiter = rate_limiter
+        self.completion_tokens = completion_tokens
+        self.stream_parser_factory = stream_parser_factory
+        self.adaptive = adaptive
+        self.cancel_inflight = cancel_inflight
+        self.controller = controller if controller is not None else YieldController(n_target)
+        self.parse_fn = parse_fn
+        self.parse_executor = parse_executor
+        self.endpoint_pool = endpoint_pool
+
+        self.n_accepted = n_accepted
+        self.n_requests = 0
+        self.n_failed = 0
+        self.n_cancelled = 0
+        self.n_jobs = 0
+        self.last_prompt = None
+        self._pending = []
+        self._consecutive_failures = 0
+        self._stopped = False
+        self._progress = None
+        self._tasks = []
+        self._inflight = set()
+        self._parsing = set()
+
+    @property
+    def n_inflight(self):
+        return len(self._inflight)
+
+    def is_done(self):
+        return self._stopped or self.n_accepted >= self.n_target
+
+    def _next_job(self):
+        # 单线程事件循环内调用，不需要加锁
+        if not self._pending:
+            final_prompt, inputs_batch = self.make_batch()
+            self.last_prompt = final_prompt[0].text if len(final_prompt) > 0 else None
+            self._pending = [GenerationJob(p.text, inputs, job_id=self.n_jobs + i)
+                             for i, (p, inputs) in enumerate(zip(final_prompt, inputs_batch))]
+            self.n_jobs += len(self._pending)
+        return self._pending.pop()
+
+    async def _invoke(self, job):
+        if self.endpoint_pool is None:
+            await self._throttle(self.rate_limiter, job)
+            return await self._send(self.chain, job)
+        endpoint = await self.endpoint_pool.acquire()
+        job.extra['endpoint'] = endpoint.name
+        try:
+            await self._throttle(endpoint.rate_limiter, job)
+            # 延迟只统计请求本身，不含限流等待
+            start = time.monotonic()
+            text = await self._send(endpoint.chain, job)
+        except NonRetryableError:
+            self.endpoint_pool.release(endpoint)
+            raise
+        except Exception as e:
+            self.endpoint_pool.record_failure(endpoint, e)
+            raise
+        except BaseException:
+            # 被取消：与端点健康无关
+            self.endpoint_pool.release(endpoint)
+            raise
+        self.endpoint_pool.record_success(endpoint, time.monotonic() - start)
+        return text
+
+    async def _throttle(self, rate_limiter, job):
+        if rate_limiter is not None:
+            await rate_limiter.acquire(estimate_tokens(job.prompt_text, self.completion_tokens))
+
+    @staticmethod
+    def _config(job):
+        # 让 chain（如 response_cache.CachedChain）识别同一请求的多次重试
+        return {'metadata': {'job_id': job.job_id}}
+
+    async def _send(self, chain, job):
+        if self.stream_parser_factory is None:
+            return await chain.ainvoke(job.inputs, config=self._config(job))
+        return await self._stream(chain, job)
+
+    async def _stream(self, chain, job):
+        parser = self.stream_parser_factory(job, self.n_target - self.n_accepted)
+        chunks = []
+        stream = chain.astream(job.inputs, config=self._config(job))
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                parser.feed(chunk)
+                if parser.should_stop() or self.is_done():
+                    break
+        finally:
+            # 提前退出时关闭流，释放连接
+            await stream.aclose()
+        parser.close()
+        job.extra['parser'] = parser
+        return ''.join(chunks)
+
+    def _backoff(self, job):
+        # 被限流时 Retry-After 已写入限流器，下次 acquire 会按它等待，不再叠加固定退避
+        if self.rate_limiter is not None and self.rate_limiter.penalty_remaining() > 0:
+            return 0
+        if self.endpoint_pool is not None:
+            # 还有其他健康端点时立即换一个重试
+            endpoint = next(ep for ep in self.endpoint_pool.endpoints if ep.name == job.extra['endpoint'])
+            if endpoint.is_throttled() or self.endpoint_pool.has_alternative(endpoint):
+                return 0
+        return self.retry_backoff ** job.attempt
+
+    async def _wait_for_dispatch(self):
+        """在途请求的预期产出已够目标时，等到有请求完成再重新估计"""
+        while (self.adaptive and not self.is_done()
+               and not self.controller.should_dispatch(self.n_accepted, self.n_inflight)):
+            self._progress.clear()
+            await self._progress.wait()
+
+    async def _worker(self):
+        while not self.is_done():
+            await self._wait_for_dispatch()
+            if self.is_done():
+                break
+            job = self._next_job()
+            task = asyncio.current_task()
+            self._inflight.add(task)
+            try:
+                text = await self._request(job)
+            finally:
+                self._inflight.discard(task)
+                self._progress.set()
+            if text is None:
+                continue
+            if self.parse_fn is not None:
+                await self._parse(job, text)
+
+            self.n_requests += 1
+            self._consecutive_failures = 0
+            accepted = self.on_response(job, text)
+            self.n_accepted += accepted or 0
+            self.controller.observe(accepted)
+            if self.is_done():
+                self._cancel_others()
+
+    async def _request(self, job):
+        while True:
+            try:
+                return await self._invoke(job)
+            except Exception as e:
+                job.attempt += 1
+                if job.attempt > self.max_retries or isinstance(e, NonRetryableError):
+                    self._record_failure(job, e)
+                    return None
+                await asyncio.sleep(self._backoff(job))
+
+    async def _parse(self, job, text):
+        # 流式接收时响应已逐行解析，只需解析 prompt 中的示例行
+        response_text = None if 'parser' in job.extra else text
+        task = asyncio.current_task()
+        self._parsing.add(task)
+        try:
+            loop = asyncio.get_running_loop()
+            job.extra['parsed'] = await loop.run_in_executor(self.parse_executor, self.parse_fn,
+                                                             job.prompt_text, response_text)
+        finally:
+            self._parsing.discard(task)
+
+    def _cancel_others(self):
+        # 目标已达成：仍在途的请求结果用不上，直接取消（连接随之关闭，不再计费）
+        if not self.cancel_inflight:
+            return
+        current = asyncio.current_task()
+        for task in self._tasks:
+            # 正在解析的响应已经付过费，让它完成
+            if task is not current and not task.done() and task not in self._parsing:
+                if task in self._inflight:
+                    self.n_cancelled += 1
+                task.cancel()
+
+    def _record_failure(self, job, exc):
+        self.n_failed += 1
+        self._consecutive_failures += 1
+        print(f"API Error (Check Quota/Network): {exc}")
+        if self.on_error is not None:
+            self.on_error(job, exc)
+        if self._consecutive_failures >= self.max_consecutive_failures:
+            # 连续失败过多（额度耗尽/网络中断），停止派发，保存已有数据
+            print(f"❌ {self._consecutive_failures} consecutive API failures, stopping.")
+            self._stopped = True
+
+    async def arun(self):
+        self._progress = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+        results = await asyncio.gather(*self._tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        if self.n_cancelled:
+            print(f"Target reached, cancelled {self.n_cancelled} in-flight request(s).")
+        return self.n_accepted
+
+    def run(self):
+        return asyncio.run(self.arun())
@@ -0,0 +1,48 @@
+"""
+按有效行产出自适应派发请求
+作用：跟踪每个请求解析/过滤后被接受的行数（指数滑动平均），
+      只有当「已接受 + 在途请求的预期产出」仍不足目标时才派发新请求，
+      让最后几批请求的数量刚好够用，而不是一直满并发地发到超过目标为止。
+"""
+
+
+class YieldController:
+    def __init__(self, n_target, prior_yield=None, smoothing=0.3, margin=1.0):
+        """
+        prior_yield: 第一个响应返回前假定的每请求产出（None: 未知，满并发派发）
+        smoothing:   新观测值在滑动平均中的权重
+        margin:      在途预期产出的折扣系数，<1 时更保守（多派发、少等待）
+        """
+        self.n_target = n_target
+        self.expected_yield = prior_yield
+        self.smoothing = smoothing
+        self.margin = margin
+        self.n_observed = 0
+
+    def observe(self, accepted):
+        accepted = accepted or 0
+        if self.expected_yield is None:
+            self.expected_yield = float(accepted)
+        else:
+            self.expected_yield += self.smoothing * (accepted - self.expected_yield)
+        self.n_observed += 1
+
+    def n_needed(self, n_accepted, n_inflight):
+        """还需新派发的请求数估计（0 表示在途请求预计已足够）"""
+        remaining = self.n_target - n_accepted - n_inflight * self._discounted_yield()
+        if remaining <= 0:
+            return 0
+        if not self._discounted_yield():
+            # 还没有观测或产出为 0：无法估计，按需继续派发
+            return 1
+        return int(-(-remaining // self._discounted_yield()))
+
+    def should_dispatch(self, n_accepted, n_inflight):
+        if n_accepted >= self.n_target:
+            return False
+        if n_inflight == 0 or self.expected_yield is None:
+            return True
+        return self.n_needed(n_accepted, n_inflight) > 0
+
+    def _discounted_yield(self):
+        return (self.expected_yield or 0.0) * self.margin
@@ -0,0 +1,278 @@
+"""
+生成流程吞吐量基准测试
+作用：对 Sick / Travel / HELOC 端到端跑一遍 EPIC 生成路径（映射 -> few-shot 采样 -> 并发请求 -> 解析 -> 过滤），
+      响应来自可回放的数据源（checkpoint 里录下的真实响应，或 MockRowSource 按种子生成），
+      输出 prompt 构建耗时、请求延迟分位数、解析耗时、过滤后有效行比例、每条有效行的 token 数、
+      端到端 rows/sec，并写入 JSON 文件以便跟踪性能回退。
+
+用法：
+    python benchmark_generation.py --datasets Sick Travel HELOC --n-target 2000 --concurrency 16
+    python benchmark_generation.py --datasets Sick --replay ../../data/syndata/Sick_DeepSeek_EPIC/Sick_checkpoint.jsonl
+    python benchmark_generation.py --datasets Sick --endpoint http://127.0.0.1:8000/v1   # 走 mock_llm_server.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from langchain_core.prompts import PromptTemplate
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataset_loader import read_table
+from util import (get_prompt_conclass, parse_prompt2df, parse_result, get_unique_features, make_final_prompt,
+                  ClassRowIndex, compile_vocabularies, filter_categorical_vectorized)
+from async_engine import AsyncGenerationEngine
+from category_mapper import make_random_categorical_values, encode_frame
+from row_accumulator import RowAccumulator
+from mock_llm_server import MockRowSource
+from prompt_budget import count_tokens, TOKENIZER_NAME
+
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'configs')
+
+
+def _bench_config(name):
+    """数据集定义与 generate_samples.py 共用 configs/*.json"""
+    with open(os.path.join(CONFIG_DIR, f'{name}.json'), 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    return {
+        'data_dir': spec.get('DATA_DIR', f"../../data/realdata/{spec['DATA_NAME']}"),
+        'target': spec['TARGET'],
+        'categorical': spec['CATEGORICAL_FEATURES'],
+    }
+
+
+BENCH_CONFIGS = {name: _bench_config(name) for name in ('Sick', 'Travel', 'HELOC')}
+
+INITIAL_PROMPT = """
+[SYSTEM INSTRUCTION]
+You are a strict tabular data generator. Output ONLY CSV rows that follow the few-shot examples below.\n\n
+"""
+
+
+class ReplaySource:
+    """按顺序循环回放 checkpoint 中录下的原始响应"""
+
+    def __init__(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        self.responses = [r['response'] for r in records if r.get('type') == 'batch']
+        if not self.responses:
+            raise ValueError(f"No recorded responses in {path}")
+        self._i = 0
+
+    def generate(self, prompt, n_rows):
+        text = self.responses[self._i % len(self.responses)]
+        self._i += 1
+        return text
+
+
+class ReplayChain:
+    """替代 `template | llm | output_parser`：渲染 prompt，模拟网络延迟，从回放源取响应"""
+
+    def __init__(self, template, source, n_rows, latency, latency_jitter, tokens_per_sec, seed=None):
+        self.template = template
+        self.source = source
+        self.n_rows = n_rows
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.tokens_per_sec = tokens_per_sec
+        self.rng = random.Random(seed)
+
+    def _delay(self):
+        return max(0.0, self.rng.gauss(self.latency, self.latency_jitter))
+
+    async def ainvoke(self, inputs, config=None):
+        text = self.source.generate(self.template.format(**inputs), self.n_rows)
+        await asyncio.sleep(self._delay() + count_tokens(text) / self.tokens_per_sec)
+        return text
+
+    async def astream(self, inputs, config=None):
+        text = self.source.generate(self.template.format(**inputs), self.n_rows)
+        await asyncio.sleep(self._delay())
+        piece = 16
+        for i in range(0, len(text), piece):
+            await asyncio.sleep((piece / 4) / self.tokens_per_sec)
+            yield text[i:i + piece]
+
+
+class TimedChain:
+    """记录每个请求（含流式）的端到端延迟"""
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.latencies = []
+
+    async def ainvoke(self, inputs, config=None):
+        start = time.perf_counter()
+        try:
+            return await self.chain.ainvoke(inputs, config=config)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def astream(self, inputs, config=None):
+        start = time.perf_counter()
+        try:
+            async for chunk in self.chain.astream(inputs, config=config):
+                yield chunk
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    arr = np.asarray(values)
+    return {f'p{q}': float(np.percentile(arr, q)) for q in (50, 90, 95, 99)} | {'mean': float(arr.mean())}
+
+
+def run_benchmark(name, cfg, args):
+    X_train = read_table(os.path.join(cfg['data_dir'], 'X_train.csv'))
+    y_train = read_table(os.path.join(cfg['data_dir'], 'y_train.csv'))
+    data = pd.concat((y_train, X_train), axis=1)
+    target = cfg['target']
+    categorical = cfg['categorical']
+
+    np.random.seed(args.seed)
+    unique_categorical_features = get_unique_features(data, categorical)
+    mapper, mapper_r, unique_categorical_features = make_random_categorical_values(unique_categorical_features,
+                                                                                   seed=args.seed)
+    data = encode_frame(data, mapper)
+
+    name_cols = ','.join(data.columns) + '\n'
+    n_class = len(unique_categorical_features[target])
+    numbering = [chr(ord('A') + i) for i in range(n_class)]
+    template = PromptTemplate.from_template(
+        get_prompt_conclass(INITIAL_PROMPT, numbering, args.n_samples_per_class, n_class, args.n_set, name_cols))
+    class_index = ClassRowIndex(data, target, unique_categorical_features[target])
+    vocabularies = compile_vocabularies(unique_categorical_features, categorical)
+
+    if args.endpoint:
+        import httpx
+        from langchain_openai import ChatOpenAI
+        from langchain_core.output_parsers import StrOutputParser
+        llm = ChatOpenAI(model=args.model, openai_api_key=os.getenv('OPENAI_API_KEY', 'mock'),
+                         openai_api_base=args.endpoint, temperature=0.1,
+                         http_async_client=httpx.AsyncClient(trust_env=False, timeout=120.0))
+        base_chain = template | llm | StrOutputParser()
+    else:
+        if args.replay:
+            source = ReplaySource(args.replay)
+        else:
+            source = MockRowSource(cfg['data_dir'], malformed_rate=args.malformed_rate, seed=args.seed)
+        base_chain = ReplayChain(template, source, args.rows_per_response, args.latency, args.latency_jitter,
+                                 args.tokens_per_sec, seed=args.seed)
+    chain = TimedChain(base_chain)
+
+    stats = {'prompt_build': [], 'parse': [], 'prompt_tokens': 0, 'completion_tokens': 0,
+             'rows_parsed': 0, 'rows_valid': 0, 'parse_errors': 0}
+    rows = RowAccumulator()
+    reject_report = {}
+
+    def make_batch():
+        start = time.perf_counter()
+        batch = make_final_prompt(unique_categorical_features, target, data, template, None, args.n_batch,
+                                  args.n_samples_per_class, args.n_set, name_cols, n_class, class_index=class_index)
+        stats['prompt_build'].append(time.perf_counter() - start)
+        return batch
+
+    def on_response(job, text):
+        stats['prompt_tokens'] += count_tokens(job.prompt_text)
+        stats['completion_tokens'] += count_tokens(text)
+        start = time.perf_counter()
+        try:
+            parse_prompt2df(job.prompt_text, split=name_cols, inital_prompt=INITIAL_PROMPT, col_name=data.columns)
+            result_df = parse_result(text, name_cols, list(data.columns), categorical, unique_categorical_features,
+                                     filter_flag=False)
+            valid_df, rejected = filter_categorical_vectorized(result_df, vocabularies)
+        except Exception:
+            stats['parse_errors'] += 1
+            return 0
+        finally:
+            stats['parse'].append(time.perf_counter() - start)
+        for column, n in rejected.items():
+            reject_report[column] = reject_report.get(column, 0) + n
+        stats['rows_parsed'] += len(result_df)
+        stats['rows_valid'] += len(valid_df)
+        rows.append(valid_df)
+        return len(valid_df)
+
+    engine = AsyncGenerationEngine(chain, make_batch, on_response, args.n_target,
+                                   max_concurrency=args.concurrency, retry_backoff=1.0)
+    start = time.perf_counter()
+    engine.run()
+    wall = time.perf_counter() - start
+
+    n_valid = max(stats['rows_valid'], 1)
+    return {
+        'dataset': name,
+        'n_target': args.n_target,
+        'concurrency': args.concurrency,
+        'n_requests': engine.n_requests,
+        'n_failed_requests': engine.n_failed,
+        'parse_errors': stats['parse_errors'],
+        'wall_seconds': wall,
+        'rows_per_sec': stats['rows_valid'] / wall if wall > 0 else None,
+        'prompt_build_seconds': _percentiles(stats['prompt_build']) | {'total': float(sum(stats['prompt_build']))},
+        'request_latency_seconds': _percentiles(chain.latencies),
+        'parse_seconds': _percentiles(stats['parse']) | {'total': float(sum(stats['parse']))},
+        'rows_parsed': stats['rows_parsed'],
+        'rows_valid': stats['rows_valid'],
+        'valid_row_yield': stats['rows_valid'] / stats['rows_parsed'] if stats['rows_parsed'] else 0.0,
+        'rejected_by_column': {k: v for k, v in reject_report.items() if v},
+        'prompt_tokens_per_valid_row': stats['prompt_tokens'] / n_valid,
+        'completion_tokens_per_valid_row': stats['completion_tokens'] / n_valid,
+        'tokenizer': TOKENIZER_NAME,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EPIC generation throughput benchmark')
+    parser.add_argument('--datasets', nargs='+', default=list(BENCH_CONFIGS), choices=list(BENCH_CONFIGS))
+    parser.add_argument('--n-target', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--n-batch', type=int, default=20)
+    parser.add_argument('--n-set', type=int, default=4)
+    parser.add_argument('--n-samples-per-class', type=int, default=15)
+    parser.add_argument('--rows-per-response', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.5, help='回放模式下模拟的平均首 token 延迟（秒）')
+    parser.add_argument('--latency-jitter', type=float, default=0.1)
+    parser.add_argument('--tokens-per-sec', type=float, default=500.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.02)
+    parser.add_argument('--replay', default=None, help='回放某次生成的 checkpoint.jsonl 中的原始响应')
+    parser.add_argument('--endpoint', default=None, help='OpenAI 兼容地址（如 mock_llm_server.py），不走回放')
+    parser.add_argument('--model', default='deepseek-ai/DeepSeek-V3')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    results = []
+    for name in args.datasets:
+        print(f"▶ Benchmarking {name} ...")
+        result = run_benchmark(name, BENCH_CONFIGS[name], args)
+        print(f"   {result['rows_valid']} valid rows in {result['wall_seconds']:.2f}s "
+              f"({result['rows_per_sec']:.1f} rows/s, yield {result['valid_row_yield']:.1%}, "
+              f"p50 latency {result['request_latency_seconds'].get('p50', 0):.2f}s)")
+        results.append(result)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': _git_commit(),
+                   'args': vars(args), 'results': results}, f, indent=2, ensure_ascii=False)
+    print(f"✅ Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
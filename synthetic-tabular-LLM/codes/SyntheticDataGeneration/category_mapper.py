@@ -0,0 +1,120 @@
+"""
+EPIC 随机单词映射（Unique Variable Mapping）
+作用：生成/保存/加载类别值 -> 随机码 的映射表。映射表与 samples 文件放在一起，
+      续跑、分片并行生成的任务可以共用同一份编码，事后统一还原。
+"""
+import json
+import random
+import string
+
+import numpy as np
+import pandas as pd
+
+
+def id_generator(size=6, chars=string.ascii_uppercase + string.digits, rng=random):
+    first = ''.join(rng.choice(string.ascii_uppercase) for _ in range(1))
+    left = ''.join(rng.choice(chars) for _ in range(size-1))
+    return first + left
+
+
+def make_random_categorical_values(unique_categorical_features, size=3, seed=None):
+    """
+    seed=None 时每次运行随机；给定 seed 时结果确定，可在多个任务间复现同一映射。
+    同一列内的随机码保证不重复，否则反向映射会丢值。
+    """
+    rng = random.Random(seed)
+    mapper = {}
+    mapper_r = {}
+    new_unique_categorical_features = {}
+    for c in unique_categorical_features:
+        mapper[c] = {}
+        mapper_r[c] = {}
+        new_unique_categorical_features[c] = []
+
+        for v in unique_categorical_features[c]:
+            a = id_generator(size, rng=rng)
+            while a in mapper_r[c]:
+                a = id_generator(size, rng=rng)
+            new_unique_categorical_features[c].append(a)
+
+            mapper[c][v] = a
+            mapper_r[c][a] = v
+    return mapper, mapper_r, new_unique_categorical_features
+
+
+def _to_builtin(x):
+    # numpy 标量无法直接 json 序列化
+    if isinstance(x, np.generic):
+        return x.item()
+    return x
+
+
+def mapper_to_state(mapper):
+    """{列: {原始值: 编码}} -> {列: [[原始值, 编码], ...]}，保留顺序且支持非字符串原始值"""
+    return {c: [[_to_builtin(v), _to_builtin(a)] for v, a in mapper[c].items()] for c in mapper}
+
+
+def mapper_from_state(state):
+    mapper, mapper_r, new_unique_categorical_features = {}, {}, {}
+    for c, pairs in state.items():
+        mapper[c] = {v: a for v, a in pairs}
+        mapper_r[c] = {a: v for v, a in pairs}
+        new_unique_categorical_features[c] = [a for _, a in pairs]
+    return mapper, mapper_r, new_unique_categorical_features
+
+
+def save_mapper(path, mapper, seed=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'seed': seed, 'mapper': mapper_to_state(mapper)}, f, ensure_ascii=False, indent=1)
+
+
+def load_mapper(path):
+    """返回 (mapper, mapper_r, new_unique_categorical_features)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    return mapper_from_state(state['mapper'])
+
+
+def load_mapper_seed(path):
+    """映射表生成时使用的种子（None 表示随机生成或未记录）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('seed')
+
+
+class CategoryCodec:
+    """
+    预先把映射表编译成 (pd.Index, 值数组) 查找表，用 get_indexer 一次性得到整列的位置码，
+    再用 NumPy 花式索引取值，替代逐个单元格的 Python lambda。
+    """
+
+    def __init__(self, mapper):
+        self.tables = {}
+        for c, m in mapper.items():
+            keys = pd.Index(list(m.keys()))
+            values = pd.Index(list(m.values())).to_numpy()
+            self.tables[c] = (keys, values)
+
+    def transform(self, df):
+        """映射表外的值保持不变"""
+        for c, (keys, values) in self.tables.items():
+            if c not in df.columns or len(keys) == 0:
+                continue
+            codes = keys.get_indexer(df[c])
+            hit = codes >= 0
+            if hit.all():
+                df[c] = values[codes]
+            else:
+                out = df[c].to_numpy(dtype=object).copy()
+                out[hit] = values[codes[hit]]
+                df[c] = pd.Series(out, index=df.index).infer_objects()
+        return df
+
+
+def encode_frame(df, mapper):
+    """原始类别值 -> 随机码；映射表外的值保持不变"""
+    return CategoryCodec(mapper).transform(df)
+
+
+def decode_frame(df, mapper_r):
+    """随机码 -> 原始类别值；映射表外的值保持不变"""
+    return CategoryCodec(mapper_r).transform(df)
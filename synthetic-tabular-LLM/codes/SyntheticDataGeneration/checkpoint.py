@@ -0,0 +1,102 @@
+"""
+生成过程的断点续跑
+作用：把每个批次的原始响应、解析后的行以及随机单词映射写入只追加的 JSONL 文件，
+      每次写入后 fsync；`--resume` 时从最后一条完整记录继续。
+"""
+import json
+import os
+from io import StringIO
+
+import pandas as pd
+
+
+def _df_to_json(df):
+    if df is None:
+        return None
+    # 默认只保留 10 位小数，续跑读回的数值会与模型实际生成的不一致
+    return df.to_json(orient='split', index=False, double_precision=15)
+
+
+def _df_from_json(s):
+    if s is None:
+        return None
+    return pd.read_json(StringIO(s), orient='split', dtype=False)
+
+
+class GenerationCheckpoint:
+    def __init__(self, path):
+        self.path = path
+        self.n_batches = 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _append(self, record):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, meta):
+        """开始新的一次生成：清空旧文件，写入元信息（参数、映射表等）"""
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
+        self.n_batches = 0
+        self._append({'type': 'meta', **meta})
+
+    def append_batch(self, prompt_text, response_text, input_df=None, result_df=None, error=None, endpoint=None,
+                     cache_key=None):
+        """
+        endpoint: 产生该响应的端点名（多端点生成时用于行级溯源）
+        cache_key: 该响应在 response_cache 中的键，续跑时据此跳过已用过的缓存条目
+        """
+        self._append({
+            'type': 'batch',
+            'seq': self.n_batches,
+            'prompt': prompt_text,
+            'response': response_text,
+            'input_rows': _df_to_json(input_df),
+            'rows': _df_to_json(result_df),
+            'error': error,
+            'endpoint': endpoint,
+            'cache_key': cache_key,
+        })
+        self.n_batches += 1
+
+    def load(self):
+        """
+        返回 {'meta': dict, 'batches': [dict, ...]}；
+        崩溃时最后一行可能只写了一半，直接丢弃该行（对应批次视为未提交）。
+        """
+        meta, batches = None, []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if record['type'] == 'meta':
+                    meta = record
+                else:
+                    record['input_rows'] = _df_from_json(record['input_rows'])
+                    record['rows'] = _df_from_json(record['rows'])
+                    batches.append(record)
+        if meta is None:
+            raise ValueError(f"Checkpoint {self.path} has no meta record")
+        self.n_batches = len(batches)
+        # 截掉半行，后续追加从干净的行边界开始
+        self._rewrite_committed(meta, batches)
+        return {'meta': meta, 'batches': batches}
+
+    def _rewrite_committed(self, meta, batches):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        n_complete = 1 + len(batches)
+        if len(lines) == n_complete and lines[-1].endswith('\n'):
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(line if line.endswith('\n') else line + '\n' for line in lines[:n_complete])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,76 @@
+"""
+按类别配额调度生成（只补少数类）
+作用：给定每个类别需要的行数（例如 sick: 多数类数量 - 少数类数量），
+      统计已接受的各类行数，few-shot 示例只从未满额的类别中抽取，
+      响应中超出配额或不需要的类别行直接丢弃，所有配额满足即停止，
+      不再为事后会被 merge_balanced_datasets.py 丢掉的多数类行付费。
+"""
+import numpy as np
+import pandas as pd
+
+
+def balance_quotas(labels):
+    """每个类别补齐到最多类别的数量：{类别: 多数类数量 - 该类数量}，已是最多的类别不出现"""
+    counts = pd.Series(labels).value_counts()
+    return {c: int(counts.max() - n) for c, n in counts.items() if counts.max() > n}
+
+
+class ClassQuotaScheduler:
+    def __init__(self, target, quotas, classes):
+        """
+        quotas:  {类别取值: 需要的行数}，取值与 data[target] 一致（使用随机单词映射时为编码后的取值）
+        classes: ClassRowIndex.classes，用于把未满额类别换算成 few-shot 槽位
+        """
+        unknown = set(quotas) - set(classes)
+        if unknown:
+            raise ValueError(f"Quota classes not in {target}: {sorted(map(str, unknown))}")
+        self.target = target
+        self.quotas = dict(quotas)
+        self.classes = list(classes)
+        self.counts = {c: 0 for c in self.quotas}
+
+    @property
+    def n_target(self):
+        return sum(self.quotas.values())
+
+    def remaining(self, c):
+        return max(self.quotas[c] - self.counts[c], 0)
+
+    def unfilled(self):
+        return [c for c in self.quotas if self.remaining(c) > 0]
+
+    def is_done(self):
+        return not self.unfilled()
+
+    def slot_classes(self, n_slots):
+        """prompt 中 n_slots 个类别分组各自抽取哪一类（ClassRowIndex 中的位置），未满额类别轮流填充"""
+        unfilled = [self.classes.index(c) for c in self.unfilled()] or \
+                   [self.classes.index(c) for c in self.quotas]
+        return [unfilled[j % len(unfilled)] for j in range(n_slots)]
+
+    def count(self, df):
+        """计入已接受的行（续跑时恢复计数用），不做筛选"""
+        if len(df) == 0:
+            return
+        for c, n in df[self.target].value_counts().items():
+            if c in self.counts:
+                self.counts[c] += int(n)
+
+    def accept(self, df):
+        """只保留未满额类别的行，每类最多取到剩余配额；返回保留的行"""
+        if len(df) == 0:
+            return df
+        labels = df[self.target].to_numpy()
+        keep = np.zeros(len(df), dtype=bool)
+        for c in self.unfilled():
+            hit = labels == c
+            # 按出现顺序保留前 remaining 行
+            keep |= hit & (np.cumsum(hit) <= self.remaining(c))
+        accepted = df[keep]
+        self.count(accepted)
+        return accepted
+
+    def summary(self, names=None):
+        """names: 编码 -> 原始类别值（使用随机单词映射时传 mapper_r[target]）"""
+        names = names or {}
+        return ', '.join(f"{names.get(c, c)}: {self.counts[c]}/{self.quotas[c]}" for c in self.quotas)
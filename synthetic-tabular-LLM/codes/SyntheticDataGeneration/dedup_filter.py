@@ -0,0 +1,107 @@
+"""
+重复行 / 记忆拷贝过滤
+作用：在每个批次解析后、计入目标之前，丢弃
+      1. 与已接受的生成行或同批其他行完全相同的行（规范化后哈希比较）；
+      2. 与真实训练行完全相同的行（LLM 直接照抄 few-shot 示例）；
+      3. 与某条真实训练行距离过近的行（最近邻索引，数值列标准化 + 类别列 one-hot）。
+      真实数据的哈希与最近邻索引只构建一次，之后每个批次增量检查。
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+
+
+class RowDeduplicator:
+    def __init__(self, real_data, categorical_features, near_copy_quantile=0.01, near_copy_threshold=None,
+                 n_reference=2000, seed=0):
+        """
+        real_data:            与生成行同一编码空间的训练数据（使用随机单词映射时为编码后的 data）
+        near_copy_threshold:  到最近真实行的距离低于该值视为近似拷贝；
+                              None 时取真实行之间最近邻距离的 near_copy_quantile 分位数
+        """
+        self.columns = list(real_data.columns)
+        self.categorical = [c for c in self.columns if c in set(categorical_features)]
+        self.numeric = [c for c in self.columns if c not in set(categorical_features)]
+
+        real = self._normalize(real_data)
+        self.real_hashes = set(self._hash(real))
+        self.seen = set()
+
+        # 数值列按真实数据标准化；类别列 one-hot，取值表固定为真实数据中的取值
+        numeric = real[self.numeric].to_numpy(dtype=float)
+        self.mean = np.nanmean(numeric, axis=0) if self.numeric else np.zeros(0)
+        std = np.nanstd(numeric, axis=0) if self.numeric else np.zeros(0)
+        self.std = np.where(std > 0, std, 1.0)
+        self.vocab = {c: pd.Index(real[c].unique()) for c in self.categorical}
+        matrix = self._features(real)
+        self.index = NearestNeighbors(n_neighbors=1).fit(matrix)
+
+        if near_copy_threshold is None:
+            rng = np.random.default_rng(seed)
+            idx = rng.choice(len(matrix), min(n_reference, len(matrix)), replace=False)
+            # 第 1 个近邻是自身，取第 2 个
+            dist, _ = self.index.kneighbors(matrix[idx], n_neighbors=2)
+            near_copy_threshold = float(np.quantile(dist[:, 1], near_copy_quantile))
+        self.threshold = near_copy_threshold
+        self.rejected = Counter()
+
+    def _normalize(self, df):
+        df = df[self.columns].copy()
+        for c in self.numeric:
+            df[c] = pd.to_numeric(df[c], errors='coerce').astype(float).round(6)
+        for c in self.categorical:
+            df[c] = df[c].astype(str).str.strip()
+        return df
+
+    @staticmethod
+    def _hash(df):
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    def _features(self, df):
+        blocks = []
+        if self.numeric:
+            numeric = df[self.numeric].to_numpy(dtype=float)
+            numeric = np.where(np.isnan(numeric), self.mean, numeric)
+            blocks.append((numeric - self.mean) / self.std)
+        for c in self.categorical:
+            codes = self.vocab[c].get_indexer(df[c])
+            onehot = np.zeros((len(df), len(self.vocab[c])))
+            hit = codes >= 0
+            onehot[np.flatnonzero(hit), codes[hit]] = 1.0
+            blocks.append(onehot)
+        return np.hstack(blocks)
+
+    def add_seen(self, df):
+        """把最终保存的行计入去重集合（每个批次提交时、续跑恢复状态时调用）"""
+        if len(df) > 0:
+            self.seen.update(self._hash(self._normalize(df)))
+
+    def filter(self, df):
+        """
+        返回去掉重复/拷贝行后的 DataFrame；不修改去重集合，
+        后续步骤（如类别配额）可能再丢弃部分行，确定保存的行由调用方用 add_seen 计入
+        """
+        if len(df) == 0:
+            return df
+        normalized = self._normalize(df)
+        hashes = self._hash(normalized)
+
+        real_copy = np.fromiter((h in self.real_hashes for h in hashes), dtype=bool, count=len(hashes))
+        duplicate = np.fromiter((h in self.seen for h in hashes), dtype=bool, count=len(hashes))
+        duplicate |= pd.Series(hashes).duplicated().to_numpy()
+        duplicate &= ~real_copy
+
+        near_copy = np.zeros(len(df), dtype=bool)
+        candidates = np.flatnonzero(~(real_copy | duplicate))
+        if len(candidates) > 0 and self.threshold > 0:
+            dist, _ = self.index.kneighbors(self._features(normalized.iloc[candidates]))
+            near_copy[candidates] = dist[:, 0] < self.threshold
+
+        self.rejected['real_copy'] += int(real_copy.sum())
+        self.rejected['duplicate'] += int(duplicate.sum())
+        self.rejected['near_copy'] += int(near_copy.sum())
+
+        keep = ~(real_copy | duplicate | near_copy)
+        return df[keep]
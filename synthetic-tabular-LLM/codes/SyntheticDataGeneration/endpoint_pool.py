@@ -0,0 +1,135 @@
+"""
+多端点负载均衡
+作用：把请求分发到多个 OpenAI 兼容端点（不同的 base url / key / 模型），每个端点有独立的限流器；
+      按观测到的延迟和错误率加权随机选择端点，连续失败的端点熔断一段时间，冷却后只放行一个试探请求，
+      成功则恢复。总吞吐随持有的额度数增加，单个服务商限流时请求自动转到其他端点。
+"""
+import asyncio
+import random
+import time
+
+
+class Endpoint:
+    """一个端点：chain（template | llm | parser）+ 独立限流器 + 延迟/错误率的指数滑动平均"""
+
+    def __init__(self, name, chain, rate_limiter=None, model=None, weight=1.0):
+        self.name = name
+        self.chain = chain
+        self.rate_limiter = rate_limiter
+        self.model = model
+        self.weight = weight
+        self.latency = None
+        self.error_rate = 0.0
+        self.n_requests = 0
+        self.n_failed = 0
+        self.inflight = 0
+        self.consecutive_failures = 0
+        self.n_trips = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    def state(self, now):
+        if now < self.open_until:
+            return 'open'
+        if self.n_trips > 0 and self.consecutive_failures > 0:
+            return 'half_open'
+        return 'closed'
+
+    def is_available(self, now):
+        # 半开状态同一时间只放行一个试探请求
+        state = self.state(now)
+        return state == 'closed' or (state == 'half_open' and not self.probing)
+
+    def is_throttled(self):
+        return self.rate_limiter is not None and self.rate_limiter.penalty_remaining() > 0
+
+
+class EndpointPool:
+    def __init__(self, endpoints, failure_threshold=3, cooldown=30.0, max_cooldown=600.0, smoothing=0.2,
+                 seed=None):
+        """
+        failure_threshold: 连续失败多少次后熔断
+        cooldown:          首次熔断时长（秒），试探失败后加倍，最多 max_cooldown
+        smoothing:         延迟/错误率 EMA 的平滑系数
+        """
+        if not endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        names = [ep.name for ep in endpoints]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate endpoint names: {names}")
+        self.endpoints = list(endpoints)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.smoothing = smoothing
+        self._rng = random.Random(seed)
+
+    def _score(self, ep, default_latency):
+        # 未观测过的端点按已知端点的平均延迟估计，保证新端点也能分到请求
+        latency = ep.latency if ep.latency is not None else default_latency
+        health = max(1.0 - ep.error_rate, 0.05)
+        return ep.weight * health / (max(latency, 1e-3) * (1 + ep.inflight))
+
+    def _choose(self, candidates):
+        known = [ep.latency for ep in self.endpoints if ep.latency is not None]
+        default_latency = sum(known) / len(known) if known else 1.0
+        scores = [self._score(ep, default_latency) for ep in candidates]
+        return self._rng.choices(candidates, weights=scores)[0]
+
+    async def acquire(self):
+        """选出一个端点并占用一个在途名额；所有端点都熔断时等到最早恢复的那个"""
+        while True:
+            now = time.monotonic()
+            ready = [ep for ep in self.endpoints if ep.is_available(now)]
+            if ready:
+                # 正被 Retry-After 限流的端点暂时避开；全部被限流时照常选，由其限流器等待
+                ep = self._choose([ep for ep in ready if not ep.is_throttled()] or ready)
+                if ep.state(now) == 'half_open':
+                    ep.probing = True
+                ep.inflight += 1
+                return ep
+            wake = min((ep.open_until for ep in self.endpoints if ep.open_until > now), default=now + 0.1)
+            await asyncio.sleep(wake - now)
+
+    def has_alternative(self, ep):
+        now = time.monotonic()
+        return any(other is not ep and other.is_available(now) and not other.is_throttled()
+                   for other in self.endpoints)
+
+    def release(self, ep):
+        """请求被取消或出现与端点无关的错误：归还名额，不计入健康统计"""
+        ep.inflight -= 1
+        ep.probing = False
+
+    def record_success(self, ep, latency):
+        self.release(ep)
+        ep.n_requests += 1
+        ep.latency = latency if ep.latency is None else \
+            (1 - self.smoothing) * ep.latency + self.smoothing * latency
+        ep.error_rate *= 1 - self.smoothing
+        ep.consecutive_failures = 0
+        ep.n_trips = 0
+        ep.open_until = 0.0
+
+    def record_failure(self, ep, exc=None):
+        was_probe = ep.probing
+        self.release(ep)
+        ep.n_requests += 1
+        ep.n_failed += 1
+        ep.error_rate = (1 - self.smoothing) * ep.error_rate + self.smoothing
+        ep.consecutive_failures += 1
+        if was_probe or ep.consecutive_failures >= self.failure_threshold:
+            cooldown = min(self.cooldown * 2 ** ep.n_trips, self.max_cooldown)
+            ep.n_trips += 1
+            ep.open_until = time.monotonic() + cooldown
+            print(f"⚠️ Endpoint {ep.name} opened circuit for {cooldown:.0f}s after "
+                  f"{ep.consecutive_failures} consecutive failure(s): {exc}")
+
+    def summary(self):
+        now = time.monotonic()
+        lines = []
+        for ep in self.endpoints:
+            latency = f"{ep.latency:.2f}s" if ep.latency is not None else "n/a"
+            lines.append(f"  {ep.name}: {ep.n_requests} requests, {ep.n_failed} failed, "
+                         f"latency {latency}, error rate {ep.error_rate:.1%}, {ep.state(now)}")
+        return "Endpoints:\n" + "\n".join(lines)
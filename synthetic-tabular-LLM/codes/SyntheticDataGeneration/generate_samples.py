@@ -0,0 +1,542 @@
+"""
+EPIC 合成数据生成（统一入口）
+作用：按数据集配置文件（configs/*.json，也支持 .yaml）生成合成样本。
+      所有数据集共用同一套流程：随机单词映射 -> 按类 few-shot prompt -> 并发请求 -> 解析/过滤 -> 还原保存，
+      新数据集只需新增一个配置文件。
+
+用法：
+    python generate_samples.py configs/Sick.json
+    python generate_samples.py configs/Travel.json --resume
+    python generate_samples.py configs/HELOC.json --set N_TARGET_SAMPLES=2000 --set CLASS_QUOTAS='"balance"'
+
+配置文件字段：DATA_NAME、TARGET、CATEGORICAL_FEATURES、DESCRIPTION（字符串或逐行列表）为必填，
+其余字段覆盖 DEFAULT_PARAMS；DATA_DIR / SAVE_DIR 缺省时由 DATA_NAME / MODEL_NAME 推出。
+"""
+import argparse
+import json
+import os
+import sys
+from urllib.parse import urlparse
+
+import httpx
+import numpy as np
+import openai
+import pandas as pd
+from langchain_openai import ChatOpenAI
+from langchain_core.output_parsers import StrOutputParser
+from langchain.prompts import PromptTemplate
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataset_loader import read_table
+from util import (get_prompt_conclass, parse_prompt2df, parse_result, get_unique_features, ClassRowIndex,
+                  compile_vocabularies, quantize_numeric)
+from prompt_budget import fit_samples_per_class, PromptTokenReport
+from async_engine import AsyncGenerationEngine
+from rate_limiter import RateLimiter
+from checkpoint import GenerationCheckpoint
+from row_accumulator import RowAccumulator
+from stream_parser import StreamingRowParser
+from response_cache import ResponseCache, CachedChain, CACHE_MODES
+from endpoint_pool import Endpoint, EndpointPool
+from parse_pool import make_parse_executor, parse_response
+from dedup_filter import RowDeduplicator
+from class_quota import ClassQuotaScheduler, balance_quotas
+from category_mapper import (make_random_categorical_values, mapper_to_state, mapper_from_state,
+                             save_mapper, load_mapper, load_mapper_seed, encode_frame, decode_frame)
+
+# 强制清除系统代理设置
+os.environ.pop("HTTP_PROXY", None)
+os.environ.pop("HTTPS_PROXY", None)
+os.environ.pop("http_proxy", None)
+os.environ.pop("https_proxy", None)
+
+DEFAULT_PARAMS = {
+    # 🔒 API Key 只从环境变量 EPIC_API_KEY 读取，不写进代码或配置文件（本地压测 mock 服务时可设为任意值）
+    "openai_key": os.getenv("EPIC_API_KEY"),
+    "model": "deepseek-ai/DeepSeek-V3",
+    "TEMPERATURE": 0.1,
+    # 本地压测时指向 mock_llm_server.py，例如 EPIC_API_BASE=http://127.0.0.1:8000/v1
+    "API_BASE": os.getenv("EPIC_API_BASE", "https://api.siliconflow.cn/v1"),
+    "N_CLASS": None,  # None: 取目标列的类别数
+    "N_SAMPLES_PER_CLASS": 15,
+    "N_SET": 4,
+    "N_BATCH": 20,
+    "ROWS_PER_RESPONSE": 20,  # 写进 prompt 规则里的每次输出行数
+    "USE_RANDOM_WORD": True,
+    "RANDOM_WORD_SEED": None,  # 给定整数时随机码确定，可复现
+    "COMPACT_PROMPT": False,  # True: 数值列按数据实际精度取整、表头只出现一次，减少输入 token
+    "PROMPT_TOKEN_BUDGET": None,  # 每个 prompt 的输入 token 上限，给定时自动下调 N_SAMPLES_PER_CLASS
+    "SAMPLING_SEED": None,  # 给定整数时 few-shot 采样确定，配合缓存可零成本复现整次生成
+    "N_TARGET_SAMPLES": 1000,
+    "MAX_CONCURRENCY": 8,
+    "FILTER_CATEGORICAL": False,  # True: 丢弃类别取值不在真实数据中的行
+    "STREAM_PARSE": True,  # 流式接收并逐行解析，有效行够数时提前结束请求
+    "PARSE_WORKERS": 0,  # >0: 在工作进程中解析（pd.read_csv），与在途请求重叠，不阻塞事件循环
+    # 类别配额，例如 {"sick": 3000}；"balance" 表示每类补齐到多数类数量。
+    # 给定时只生成配额内的类别，配额满即停，N_TARGET_SAMPLES 由配额之和决定
+    "CLASS_QUOTAS": None,
+    "DEDUP_FILTER": True,  # 丢弃重复行、照抄真实数据的行和近似拷贝，不计入目标
+    "NEAR_COPY_QUANTILE": 0.01,  # 近似拷贝阈值：真实行之间最近邻距离的分位数
+    "RPM_LIMIT": None,  # None: 从 x-ratelimit-* 响应头自动获取
+    "TPM_LIMIT": None,
+    # 多端点负载均衡，例如 [{"name": "sf", "api_base": "...", "api_key_env": "SF_KEY", "model": "...", "rpm": 500}]；
+    # 缺省字段取上面的 API_BASE / openai_key / model / RPM_LIMIT / TPM_LIMIT，None 表示只用单个端点
+    "ENDPOINTS": None,
+    "CIRCUIT_FAILURES": 3,  # 端点连续失败多少次后熔断
+    "CIRCUIT_COOLDOWN": 30,  # 首次熔断秒数，试探失败后加倍
+    "CACHE_MODE": "readwrite",  # off / readwrite / replay（只读，未命中即报错）
+    "CACHE_MAX_MB": 1024,  # 超出后按最近使用时间淘汰
+    "CACHE_DIR": "../../data/llm_cache",
+}
+
+REQUIRED_KEYS = ('DATA_NAME', 'TARGET', 'CATEGORICAL_FEATURES', 'DESCRIPTION')
+
+INITIAL_PROMPT = """
+[SYSTEM INSTRUCTION]
+You are a strict tabular data generator.
+Your task is to generate new synthetic data samples that follow the EXACT format, distribution, and unique encoding patterns of the few-shot examples provided below.
+
+RULES:
+1. Output ONLY the CSV data rows.
+2. Do NOT include any explanations, analysis, headers, or introductory text.
+3. Do NOT use Markdown formatting (no ```csv ... ```).
+4. Each line must be a valid comma-separated value string.
+5. Generate exactly {n_rows} lines of new data.
+
+[DATA DESCRIPTION]
+{description}\n\n
+"""
+
+
+def load_spec(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def parse_override(item):
+    """KEY=VALUE，VALUE 按 JSON 解析，失败时当作字符串"""
+    key, sep, value = item.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got {item!r}")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def build_params(spec, overrides=()):
+    missing = [k for k in REQUIRED_KEYS if k not in spec]
+    if missing:
+        raise ValueError(f"Dataset spec is missing required keys: {missing}")
+    params = dict(DEFAULT_PARAMS)
+    params.update({"MODEL_NAME": f"{spec['DATA_NAME']}_DeepSeek_EPIC"})
+    params.update(spec)
+    params.update(dict(overrides))
+    params.setdefault("DATA_DIR", f"../../data/realdata/{params['DATA_NAME']}")
+    params.setdefault("SAVE_DIR", f"../../data/syndata/{params['MODEL_NAME']}")
+    if not isinstance(params['DESCRIPTION'], str):
+        params['DESCRIPTION'] = '\n'.join(params['DESCRIPTION'])
+    if '{' in params['DESCRIPTION'] or '}' in params['DESCRIPTION']:
+        # 描述会进入 PromptTemplate，花括号会被当作模板变量
+        raise ValueError("DESCRIPTION must not contain '{' or '}'")
+    return params
+
+
+def endpoint_specs(params):
+    """ENDPOINTS 中每项补齐缺省字段；未配置 ENDPOINTS 时只有一个由顶层参数定义的端点"""
+    defaults = {'api_base': params['API_BASE'], 'api_key': params['openai_key'], 'model': params['model'],
+                'rpm': params['RPM_LIMIT'], 'tpm': params['TPM_LIMIT'], 'weight': 1.0}
+    specs = []
+    for j, spec in enumerate(params['ENDPOINTS'] or [{}]):
+        spec = {**defaults, **spec}
+        if 'api_key_env' in spec:
+            # 配置文件里只写环境变量名，避免把 key 提交进仓库
+            if spec['api_key_env'] not in os.environ:
+                raise ValueError(f"Environment variable {spec['api_key_env']} is not set")
+            spec['api_key'] = os.environ[spec['api_key_env']]
+        if not spec['api_key']:
+            raise ValueError("No API key: set the EPIC_API_KEY environment variable "
+                             "(or api_key_env for each entry of ENDPOINTS)")
+        if 'name' not in spec:
+            spec['name'] = f"{urlparse(spec['api_base']).netloc}/{spec['model']}"
+            if params['ENDPOINTS']:
+                spec['name'] += f"#{j}"
+        specs.append(spec)
+    return specs
+
+
+def make_llm(spec, temperature):
+    """每个端点独立的限流器与 http 客户端；trust_env=False：不走系统代理"""
+    # 限流器通过 event hook 读取响应头（x-ratelimit-* / Retry-After）
+    rate_limiter = RateLimiter(rpm=spec['rpm'], tpm=spec['tpm'])
+    http_client = httpx.Client(trust_env=False, event_hooks=rate_limiter.sync_event_hooks())
+    http_async_client = httpx.AsyncClient(trust_env=False, event_hooks=rate_limiter.async_event_hooks())
+    llm = ChatOpenAI(
+        model=spec['model'],
+        openai_api_key=spec['api_key'],
+        openai_api_base=spec['api_base'],
+        temperature=temperature,
+        http_client=http_client,
+        http_async_client=http_async_client  # 异步并发生成使用
+    )
+    return llm, rate_limiter
+
+
+def generate(params, args):
+    cache_mode = args.cache_mode or params['CACHE_MODE']
+
+    if params['SAMPLING_SEED'] is not None:
+        np.random.seed(params['SAMPLING_SEED'])
+
+    # 缺少 API Key 时在加载数据、发出请求之前报错
+    specs = endpoint_specs(params)
+    openai.api_key = specs[0]['api_key']
+    os.environ["OPENAI_API_KEY"] = specs[0]['api_key']
+
+    llms = [make_llm(spec, params['TEMPERATURE']) for spec in specs]
+    output_parser = StrOutputParser()
+
+    # ==========================================
+    # 📂 数据加载与预处理
+    # ==========================================
+    DATA_NAME = params['DATA_NAME']
+    TARGET = params['TARGET']
+    CATEGORICAL_FEATURES = params['CATEGORICAL_FEATURES']
+    REAL_DATA_SAVE_DIR = params['DATA_DIR']
+    SYN_DATA_SAVE_DIR = params['SAVE_DIR']
+    os.makedirs(SYN_DATA_SAVE_DIR, exist_ok=True)
+
+    # 每个批次提交后写入 checkpoint，崩溃/额度耗尽后可用 --resume 继续
+    checkpoint = GenerationCheckpoint(os.path.join(SYN_DATA_SAVE_DIR, f'{DATA_NAME}_checkpoint.jsonl'))
+    resume_state = None
+    if args.resume and checkpoint.exists():
+        resume_state = checkpoint.load()
+        print(f"Resuming from checkpoint: {checkpoint.n_batches} committed batches")
+        # 已生成的行是否经过随机单词编码由 checkpoint 决定，配置不一致时续跑结果无法还原
+        used_random_word = resume_state['meta'].get('mapper') is not None
+        if used_random_word != bool(params['USE_RANDOM_WORD']):
+            raise ValueError(
+                f"Checkpoint {checkpoint.path} was written with USE_RANDOM_WORD={used_random_word}, "
+                f"but the current config has USE_RANDOM_WORD={params['USE_RANDOM_WORD']}: "
+                f"resume with the original config, or run without --resume to start a new checkpoint")
+        if params['SAMPLING_SEED'] is not None:
+            # 按已提交批次数偏移种子：否则会重新抽到前面批次的示例，缓存也会返回同样的响应
+            np.random.seed([params['SAMPLING_SEED'], checkpoint.n_batches])
+
+    print(f"Loading data from {REAL_DATA_SAVE_DIR}...")
+    try:
+        X_train = read_table(os.path.join(REAL_DATA_SAVE_DIR, 'X_train.csv'))
+        y_train = read_table(os.path.join(REAL_DATA_SAVE_DIR, 'y_train.csv'))
+    except FileNotFoundError:
+        print(f"❌ 错误: 找不到数据文件。请检查 {REAL_DATA_SAVE_DIR} 目录下是否有 X_train.csv 和 y_train.csv")
+        return None
+
+    data = pd.concat((y_train, X_train), axis=1)
+    NAME_COLS = ','.join(data.columns) + '\n'
+    unique_categorical_features = get_unique_features(data, CATEGORICAL_FEATURES)
+
+    # ==========================================
+    # 🔠 EPIC 核心: 随机单词映射 (Random Word Mapping)
+    # ==========================================
+    mapper = mapper_r = mapper_seed = None
+    if params['USE_RANDOM_WORD']:
+        print("Applying Unique Variable Mapping strategy...")
+        mapper_path = os.path.join(SYN_DATA_SAVE_DIR, f'{DATA_NAME}_mapper.json')
+        if resume_state is not None:
+            # 续跑必须沿用上次的映射，否则已生成的行无法还原；种子沿用首次运行记录的值
+            mapper, mapper_r, unique_categorical_features = mapper_from_state(resume_state['meta']['mapper'])
+            mapper_seed = resume_state['meta'].get('mapper_seed')
+            if mapper_seed is None and os.path.exists(mapper_path):
+                mapper_seed = load_mapper_seed(mapper_path)
+        elif args.mapper is not None:
+            # 分片/多次运行共用同一份映射，事后可统一还原
+            mapper, mapper_r, unique_categorical_features = load_mapper(args.mapper)
+            mapper_seed = load_mapper_seed(args.mapper)
+        else:
+            mapper_seed = params['RANDOM_WORD_SEED']
+            mapper, mapper_r, unique_categorical_features = make_random_categorical_values(
+                unique_categorical_features, seed=mapper_seed)
+        # 映射表与 samples 文件放在一起，记录生成该映射的种子
+        save_mapper(mapper_path, mapper, seed=mapper_seed)
+
+        data = encode_frame(data, mapper)
+
+    # ==========================================
+    # 📝 Prompt 模板构建
+    # ==========================================
+    initial_prompt = INITIAL_PROMPT.format(n_rows=params['ROWS_PER_RESPONSE'], description=params['DESCRIPTION'])
+
+    N_CLASS = params['N_CLASS'] or len(unique_categorical_features[TARGET])
+    numbering = [chr(ord('A') + j) for j in range(N_CLASS)]
+    N_SAMPLES_PER_CLASS = params['N_SAMPLES_PER_CLASS']
+    N_SET = params['N_SET']
+    N_BATCH = params['N_BATCH']
+
+    def build_template(n_samples_per_class, repeat_header=True):
+        return get_prompt_conclass(initial_prompt, numbering, n_samples_per_class, N_CLASS, N_SET, NAME_COLS,
+                                   repeat_header=repeat_header)
+
+    raw_data = data
+    if params['COMPACT_PROMPT']:
+        data = quantize_numeric(data, exclude=CATEGORICAL_FEATURES)
+    if params['PROMPT_TOKEN_BUDGET'] is not None:
+        N_SAMPLES_PER_CLASS = fit_samples_per_class(lambda n: build_template(n, not params['COMPACT_PROMPT']),
+                                                    data, params['PROMPT_TOKEN_BUDGET'], N_SET, N_CLASS,
+                                                    N_SAMPLES_PER_CLASS)
+        print(f"Token budget {params['PROMPT_TOKEN_BUDGET']}: {N_SAMPLES_PER_CLASS} samples per class")
+
+    template1 = build_template(N_SAMPLES_PER_CLASS, repeat_header=not params['COMPACT_PROMPT'])
+    prompt_report = PromptTokenReport()
+    template1_prompt = PromptTemplate.from_template(template1)
+
+    # 按 (模型, temperature, prompt) 缓存响应，相同配置重跑时直接读盘，不再计费
+    response_cache = None
+    if cache_mode != 'off':
+        response_cache = ResponseCache(params['CACHE_DIR'], max_bytes=params['CACHE_MAX_MB'] * 2**20)
+
+    # 续跑时已提交到 checkpoint 的缓存键，不再从缓存中取用
+    committed_keys = set()
+    if resume_state is not None:
+        committed_keys = {batch['cache_key'] for batch in resume_state['batches'] if batch.get('cache_key')}
+
+    def make_chain(llm):
+        chain = (
+            template1_prompt
+            | llm
+            | output_parser
+        )
+        if response_cache is not None:
+            chain = CachedChain(chain, template1_prompt, response_cache, llm.model_name, llm.temperature,
+                                mode=cache_mode, committed=committed_keys)
+        return chain
+
+    llm1 = make_chain(llms[0][0])
+    # 端点名 -> chain，提交批次时从对应的 CachedChain 取缓存键
+    chains = {specs[0]['name']: llm1}
+    endpoint_pool = None
+    if params['ENDPOINTS']:
+        chains = {spec['name']: make_chain(llm) for spec, (llm, _) in zip(specs, llms)}
+        endpoint_pool = EndpointPool([Endpoint(spec['name'], chains[spec['name']], limiter, model=spec['model'],
+                                               weight=spec['weight'])
+                                      for spec, (llm, limiter) in zip(specs, llms)],
+                                     failure_threshold=params['CIRCUIT_FAILURES'],
+                                     cooldown=params['CIRCUIT_COOLDOWN'], seed=params['SAMPLING_SEED'])
+        print(f"Load balancing over {len(specs)} endpoints: {[spec['name'] for spec in specs]}")
+
+    # ==========================================
+    # 🔄 开始生成循环
+    # ==========================================
+    # 分块累积，结束时只 concat 一次
+    input_df_all = RowAccumulator()
+    synthetic_df_all = RowAccumulator()
+    # 与 synthetic_df_all 逐行对应：产生该行的端点名
+    row_endpoints = []
+    columns = list(data.columns)
+    err = []
+
+    if resume_state is not None:
+        for batch in resume_state['batches']:
+            if batch['error'] is not None:
+                err.append(batch['response'])
+                continue
+            input_df_all.append(batch['input_rows'])
+            synthetic_df_all.append(batch['rows'])
+            row_endpoints.extend([batch.get('endpoint') or specs[0]['name']] * len(batch['rows']))
+    else:
+        checkpoint.start({
+            'DATA_NAME': DATA_NAME,
+            'MODEL_NAME': params['MODEL_NAME'],
+            'mapper': mapper_to_state(mapper) if params['USE_RANDOM_WORD'] else None,
+            'mapper_seed': mapper_seed,
+        })
+
+    # 类别索引与 few-shot 行字符串只构建一次，每个批次只做下标采样
+    class_index = ClassRowIndex(data, TARGET, unique_categorical_features[TARGET])
+    target_names = mapper_r[TARGET] if params['USE_RANDOM_WORD'] else None
+
+    quota = None
+    if params['CLASS_QUOTAS'] is not None:
+        if params['CLASS_QUOTAS'] == 'balance':
+            quotas = balance_quotas(data[TARGET])
+        else:
+            # JSON 配置中的键都是字符串，按真实类别值的字符串形式匹配
+            by_name = {str(v): v for v in (mapper[TARGET] if params['USE_RANDOM_WORD'] else class_index.classes)}
+            quotas = {by_name[str(c)]: n for c, n in params['CLASS_QUOTAS'].items()}
+            if params['USE_RANDOM_WORD']:
+                quotas = {mapper[TARGET][c]: n for c, n in quotas.items()}
+        quota = ClassQuotaScheduler(TARGET, quotas, class_index.classes)
+        quota.count(synthetic_df_all.to_frame())
+        params['N_TARGET_SAMPLES'] = quota.n_target
+        print(f"Class quotas: {quota.summary(target_names)}")
+
+    dedup = None
+    if params['DEDUP_FILTER']:
+        dedup = RowDeduplicator(data, CATEGORICAL_FEATURES, near_copy_quantile=params['NEAR_COPY_QUANTILE'])
+        dedup.add_seen(synthetic_df_all.to_frame())
+
+    print(f"Start generating {params['N_TARGET_SAMPLES']} samples...")
+    numeric_columns = [c for c in columns if pd.api.types.is_numeric_dtype(data[c])]
+    # 类别取值表只编译一次；reject_report 累计各列被拒绝的行数
+    vocabularies = compile_vocabularies(unique_categorical_features, CATEGORICAL_FEATURES)
+    reject_report = {}
+
+    # 开启压缩时，同一批示例再按未压缩的模板和原始数值渲染一遍，作为节省量的基准
+    baseline_index = baseline_prompt = None
+    if params['COMPACT_PROMPT']:
+        baseline_index = class_index.rerender(raw_data)
+        baseline_prompt = PromptTemplate.from_template(build_template(N_SAMPLES_PER_CLASS))
+
+    def make_batch():
+        # 与 make_final_prompt(..., class_index=class_index) 相同，保留下标以便渲染基准 prompt
+        slot_classes = quota.slot_classes(N_CLASS) if quota else None
+        sample = class_index.sample(N_BATCH, N_SET, N_SAMPLES_PER_CLASS, slot_classes)
+        inputs_batch = class_index.inputs_from_sample(sample, slot_classes)
+        final_prompt = template1_prompt.batch(inputs_batch)
+        if baseline_index is None:
+            for p in final_prompt:
+                prompt_report.observe(p.text)
+        else:
+            baseline = baseline_prompt.batch(baseline_index.inputs_from_sample(sample, slot_classes))
+            for p, b in zip(final_prompt, baseline):
+                prompt_report.observe(p.text, b.text)
+        return final_prompt, inputs_batch
+
+    def make_stream_parser(job, n_remaining):
+        return StreamingRowParser(columns, CATEGORICAL_FEATURES, unique_categorical_features, numeric_columns,
+                                  name_cols=NAME_COLS, filter_flag=params['FILTER_CATEGORICAL'], max_rows=n_remaining)
+
+    def on_response(job, text):
+        endpoint = job.extra.get('endpoint', specs[0]['name'])
+        chain = chains[endpoint]
+        cache_key = chain.take_key(job.job_id) if isinstance(chain, CachedChain) else None
+        try:
+            # 解析生成的文本为 DataFrame（PARSE_WORKERS > 0 时已在工作进程中解析）
+            parsed = job.extra.get('parsed')
+            if parsed is not None and parsed.error is not None:
+                raise ValueError(parsed.error)
+            if parsed is not None:
+                input_df = parsed.input_frame()
+            else:
+                input_df = parse_prompt2df(job.prompt_text, split=NAME_COLS, inital_prompt=initial_prompt,
+                                           col_name=data.columns)
+            if 'parser' in job.extra:
+                # 流式接收时已逐行解析完毕
+                result_df = job.extra['parser'].to_frame()
+                for reason, n in job.extra['parser'].rejected.items():
+                    reject_report[reason] = reject_report.get(reason, 0) + n
+                if len(result_df) == 0:
+                    raise ValueError("No valid rows in streamed response")
+            elif parsed is not None:
+                result_df = parsed.result_frame()
+                for reason, n in parsed.rejected.items():
+                    reject_report[reason] = reject_report.get(reason, 0) + n
+            else:
+                result_df = parse_result(text, NAME_COLS, columns, CATEGORICAL_FEATURES, unique_categorical_features,
+                                         filter_flag=params['FILTER_CATEGORICAL'], vocabularies=vocabularies,
+                                         report=reject_report)
+
+            if dedup is not None:
+                result_df = dedup.filter(result_df)
+            if quota is not None:
+                # 只保留仍未满额的类别
+                result_df = quota.accept(result_df)
+            if dedup is not None:
+                dedup.add_seen(result_df)
+
+            input_df_all.append(input_df)
+            synthetic_df_all.append(result_df)
+            row_endpoints.extend([endpoint] * len(result_df))
+        except Exception as e:
+            # 捕获解析错误（LLM有时候格式会乱）
+            err.append(text)
+            checkpoint.append_batch(job.prompt_text, text, error=str(e), endpoint=endpoint,
+                                    cache_key=cache_key)
+            print(f"Parsing error: {e}")
+            return 0
+        checkpoint.append_batch(job.prompt_text, text, input_df, result_df, endpoint=endpoint,
+                                cache_key=cache_key)
+        print(f'Progress: {len(synthetic_df_all)} / {params["N_TARGET_SAMPLES"]}')
+        return len(result_df)
+
+    parse_executor = None
+    if params['PARSE_WORKERS'] > 0:
+        parse_executor = make_parse_executor(params['PARSE_WORKERS'], {
+            'name_cols': NAME_COLS,
+            'initial_prompt': initial_prompt,
+            'columns': columns,
+            'categorical_features': CATEGORICAL_FEATURES,
+            'unique_features': unique_categorical_features,
+            'filter_flag': params['FILTER_CATEGORICAL'],
+        })
+
+    # 并发调用 LLM API，由限流器控制节奏
+    engine = AsyncGenerationEngine(llm1, make_batch, on_response, params['N_TARGET_SAMPLES'],
+                                   max_concurrency=params['MAX_CONCURRENCY'], rate_limiter=llms[0][1],
+                                   n_accepted=len(synthetic_df_all),
+                                   stream_parser_factory=make_stream_parser if params['STREAM_PARSE'] else None,
+                                   parse_fn=parse_response if parse_executor is not None else None,
+                                   parse_executor=parse_executor, endpoint_pool=endpoint_pool)
+    engine.run()
+    if parse_executor is not None:
+        parse_executor.shutdown()
+    final_prompt_text = engine.last_prompt or ""
+    if quota is not None:
+        print(f"Class quotas: {quota.summary(target_names)}")
+    if response_cache is not None:
+        print(response_cache.summary())
+    print(prompt_report.summary())
+    if endpoint_pool is not None:
+        print(endpoint_pool.summary())
+    if dedup is not None and any(dedup.rejected.values()):
+        print(f"Dropped duplicate/copied rows: {dict(dedup.rejected)}")
+    if any(reject_report.values()):
+        print(f"Rejected rows by reason: { {k: v for k, v in reject_report.items() if v} }")
+
+    # ==========================================
+    # 💾 还原映射并保存
+    # ==========================================
+    # 最后一个响应可能超出目标，只保留前 N_TARGET_SAMPLES 行
+    synthetic_df_all = synthetic_df_all.to_frame().iloc[:params['N_TARGET_SAMPLES']]
+    synthetic_df_all_r = synthetic_df_all.copy()
+
+    if params['USE_RANDOM_WORD']:
+        # 将随机码还原为原始类别值
+        print("Reversing Unique Variable Mapping...")
+        synthetic_df_all_r = decode_frame(synthetic_df_all_r, mapper_r)
+
+    file_name = os.path.join(SYN_DATA_SAVE_DIR, f'{DATA_NAME}_samples.csv')
+
+    # 保存 Prompt 模板以供检查
+    with open(file_name.replace('.csv', '.txt'), 'w', encoding='utf-8') as f:
+        f.write(template1 + '\n===\n' + final_prompt_text)
+
+    synthetic_df_all_r.to_csv(file_name, index_label='synindex')
+    # 行级溯源：与 samples 文件逐行对应，记录产生每一行的端点和模型
+    models = {spec['name']: spec['model'] for spec in specs}
+    provenance = pd.DataFrame({'endpoint': row_endpoints[:len(synthetic_df_all_r)]}, index=synthetic_df_all_r.index)
+    provenance['model'] = provenance['endpoint'].map(models)
+    provenance.to_csv(file_name.replace('_samples.csv', '_provenance.csv'), index_label='synindex')
+    print(f'✅ Done! Synthetic data saved to: {file_name}')
+    print(f'📊 Total samples generated: {len(synthetic_df_all_r)}')
+    print(f'❌ Parsing errors: {len(err)}')
+    return synthetic_df_all_r
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='EPIC synthetic data generation')
+    parser.add_argument('config', help='数据集配置文件（configs/*.json）')
+    parser.add_argument('--resume', action='store_true', help='从 checkpoint 中最后一个已提交的批次继续生成')
+    parser.add_argument('--mapper', default=None, help='复用已保存的随机单词映射表（{DATA_NAME}_mapper.json）')
+    parser.add_argument('--cache-mode', choices=CACHE_MODES, default=None, help='覆盖配置中的 CACHE_MODE')
+    parser.add_argument('--set', dest='overrides', action='append', type=parse_override, default=[],
+                        metavar='KEY=VALUE', help='覆盖配置项，VALUE 按 JSON 解析（可重复）')
+    args = parser.parse_args(argv)
+    params = build_params(load_spec(args.config), args.overrides)
+    return generate(params, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+本地模拟的 OpenAI 兼容 chat-completions 服务
+作用：不花钱、不联网地跑通/压测生成流程（并发、限流、解析、重试）。
+      返回的行从真实 X_train.csv / y_train.csv 采样；若 prompt 里的示例行使用了随机单词编码，
+      对应类别列改为从 prompt 中出现的编码里抽取，保证输出和真实调用一样可以被解析/还原。
+
+用法：
+    python mock_llm_server.py --data-dir ../../data/realdata/Sick --port 8000 --latency 2 --rpm 120
+    然后把脚本中的 openai_api_base 换成 http://127.0.0.1:8000/v1
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataset_loader import read_table
+
+
+class MockRowSource:
+    """按 prompt 生成一段“LLM 输出”文本，可在服务之外直接调用（benchmark 回放用）"""
+
+    def __init__(self, data_dir, malformed_rate=0.0, seed=None):
+        X_train = read_table(os.path.join(data_dir, 'X_train.csv'))
+        y_train = read_table(os.path.join(data_dir, 'y_train.csv'))
+        data = pd.concat((y_train, X_train), axis=1)
+        self.columns = list(data.columns)
+        self.header = ','.join(self.columns)
+        self.rows = data.astype(str).to_numpy().tolist()
+        self.real_values = [set(data[c].astype(str)) for c in self.columns]
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _prompt_vocab(self, prompt):
+        """收集 prompt 示例行里每列出现过的取值"""
+        vocab = [set() for _ in self.columns]
+        for line in prompt.split('\n'):
+            fields = line.strip().split(',')
+            if len(fields) != len(self.columns) or line.strip() == self.header:
+                continue
+            for i, f in enumerate(fields):
+                vocab[i].add(f)
+        return vocab
+
+    def _malformed(self, fields):
+        kind = self.rng.randrange(3)
+        if kind == 0:
+            return ','.join(fields[:len(fields) // 2])
+        if kind == 1:
+            return 'Here is another sample row:'
+        return ','.join(fields + ['EXTRA'])
+
+    def generate(self, prompt, n_rows):
+        vocab = self._prompt_vocab(prompt)
+        # 示例取值与真实取值没有交集的列 = 使用了随机单词编码的列
+        encoded = {i: sorted(v) for i, v in enumerate(vocab) if v and not (v & self.real_values[i])}
+        lines = []
+        with self._lock:
+            for _ in range(n_rows):
+                fields = list(self.rng.choice(self.rows))
+                for i, choices in encoded.items():
+                    fields[i] = self.rng.choice(choices)
+                if self.rng.random() < self.malformed_rate:
+                    lines.append(self._malformed(fields))
+                else:
+                    lines.append(','.join(fields))
+            wrap_markdown = self.rng.random() < self.malformed_rate
+        text = '\n'.join(lines)
+        if wrap_markdown:
+            text = f"```csv\n{self.header}\n{text}\n```"
+        return text
+
+
+class RequestWindow:
+    """滑动窗口 RPM 计数，用于模拟 429"""
+
+    def __init__(self, rpm):
+        self.rpm = rpm
+        self.stamps = deque()
+        self._lock = threading.Lock()
+
+    def admit(self):
+        """返回 (是否放行, 剩余次数, 距离窗口释放的秒数)"""
+        now = time.monotonic()
+        with self._lock:
+            while self.stamps and now - self.stamps[0] >= 60.0:
+                self.stamps.popleft()
+            reset = 60.0 - (now - self.stamps[0]) if self.stamps else 0.0
+            if self.rpm is not None and len(self.stamps) >= self.rpm:
+                return False, 0, reset
+            self.stamps.append(now)
+            remaining = None if self.rpm is None else self.rpm - len(self.stamps)
+            return True, remaining, reset
+
+
+def make_handler(source, args, window):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *a):
+            if args.verbose:
+                super().log_message(format, *a)
+
+        def _ratelimit_headers(self, remaining, reset):
+            if args.rpm is None:
+                return {}
+            return {
+                'x-ratelimit-limit-requests': str(args.rpm),
+                'x-ratelimit-remaining-requests': str(max(remaining, 0)),
+                'x-ratelimit-reset-requests': f'{reset:.3f}s',
+            }
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+
+            admitted, remaining, reset = window.admit()
+            if not admitted or random.random() < args.rate_limit_prob:
+                retry_after = max(reset, 1.0) if not admitted else 1.0
+                headers = self._ratelimit_headers(0, reset)
+                headers['Retry-After'] = f'{retry_after:.0f}'
+                self._send_json(429, {'error': {'message': 'Rate limit reached (mock)', 'type': 'rate_limit_error'}},
+                                headers)
+                return
+
+            prompt = '\n'.join(m.get('content', '') for m in request.get('messages', []))
+            text = source.generate(prompt, args.rows_per_response)
+            prompt_tokens = len(prompt) // 4
+            completion_tokens = len(text) // 4
+            model = request.get('model', 'mock')
+            completion_id = f'chatcmpl-{uuid.uuid4().hex[:12]}'
+            headers = self._ratelimit_headers(remaining, reset)
+
+            time.sleep(max(0.0, random.gauss(args.latency, args.latency_jitter)))
+            if request.get('stream'):
+                self._stream(text, model, completion_id, headers)
+                return
+
+            time.sleep(completion_tokens / args.tokens_per_sec)
+            self._send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                          'total_tokens': prompt_tokens + completion_tokens},
+            }, headers)
+
+        def _stream(self, text, model, completion_id, headers):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.close_connection = True
+
+            def event(delta, finish_reason=None):
+                chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                         'model': model, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]}
+                self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode('utf-8'))
+                self.wfile.flush()
+
+            try:
+                event({'role': 'assistant', 'content': ''})
+                piece = 16  # 约 4 个 token 一块
+                for i in range(0, len(text), piece):
+                    time.sleep((piece / 4) / args.tokens_per_sec)
+                    event({'content': text[i:i + piece]})
+                event({}, 'stop')
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # 客户端有效行够数后提前断开
+                pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock OpenAI-compatible chat-completions server')
+    parser.add_argument('--data-dir', required=True, help='包含 X_train.csv / y_train.csv 的目录')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=1.0, help='首 token 前的平均延迟（秒）')
+    parser.add_argument('--latency-jitter', type=float, default=0.2)
+    parser.add_argument('--tokens-per-sec', type=float, default=200.0, help='单个请求的输出速度')
+    parser.add_argument('--rows-per-response', type=int, default=20)
+    parser.add_argument('--rpm', type=int, default=None, help='超过该 RPM 返回 429（带 Retry-After）')
+    parser.add_argument('--rate-limit-prob', type=float, default=0.0, help='随机返回 429 的概率')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='每行/每个响应注入格式错误的概率')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    source = MockRowSource(args.data_dir, malformed_rate=args.malformed_rate, seed=args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(source, args, RequestWindow(args.rpm)))
+    print(f"🧪 Mock LLM server on http://{args.host}:{args.port}/v1 ({len(source.rows)} real rows)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+进程池并行解析 LLM 响应
+作用：把 parse_prompt2df / parse_result（都基于 pd.read_csv）从事件循环线程挪到工作进程，
+      引擎用 run_in_executor 提交，解析与在途的网络请求重叠进行。
+      工作进程返回按列存放的类型化数组和错误记录，主进程只需拼成 DataFrame。
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from util import parse_prompt2df, parse_result, compile_vocabularies
+
+# 工作进程内的解析配置，由 initializer 设置一次，避免每个任务重复序列化
+_CONFIG = None
+
+
+@dataclass
+class ParsedResponse:
+    """一次响应的解析结果：列名 -> NumPy 数组；出错时 error 非空"""
+    input_columns: dict = None
+    result_columns: dict = None
+    error: str = None
+    rejected: dict = field(default_factory=dict)
+
+    @staticmethod
+    def _frame(columns):
+        return pd.DataFrame(columns) if columns is not None else None
+
+    def input_frame(self):
+        return self._frame(self.input_columns)
+
+    def result_frame(self):
+        return self._frame(self.result_columns)
+
+
+def _to_columns(df):
+    return {c: df[c].to_numpy() for c in df.columns}
+
+
+def init_parse_worker(config):
+    """
+    config: name_cols, initial_prompt, columns, categorical_features, unique_features, filter_flag
+    """
+    global _CONFIG
+    _CONFIG = dict(config)
+    _CONFIG['vocabularies'] = compile_vocabularies(config['unique_features'], config['categorical_features'])
+
+
+def parse_response(prompt_text, response_text=None):
+    """response_text=None 时只解析 prompt 中的示例行（流式接收时响应已逐行解析）"""
+    cfg = _CONFIG
+    parsed = ParsedResponse()
+    try:
+        input_df = parse_prompt2df(prompt_text, split=cfg['name_cols'], inital_prompt=cfg['initial_prompt'],
+                                   col_name=cfg['columns'])
+        parsed.input_columns = _to_columns(input_df)
+        if response_text is not None:
+            result_df = parse_result(response_text, cfg['name_cols'], list(cfg['columns']),
+                                     cfg['categorical_features'], cfg['unique_features'],
+                                     filter_flag=cfg['filter_flag'], vocabularies=cfg['vocabularies'],
+                                     report=parsed.rejected)
+            parsed.result_columns = _to_columns(result_df)
+    except Exception as e:
+        parsed.error = str(e)
+    return parsed
+
+
+def make_parse_executor(n_workers, config):
+    """
+    工作进程用 forkserver 启动（没有 forkserver 的平台用 spawn）：执行器在事件循环内首次提交任务时才创建进程，
+    此时主进程已有 httpx / asyncio 的线程，fork 会把这些线程持有的锁复制进子进程，可能死锁。
+    子进程会重新导入主模块，入口脚本必须有 `if __name__ == '__main__'` 保护（generate_samples.py 与各数据集脚本均已具备）。
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    return ProcessPoolExecutor(n_workers, mp_context=context, initializer=init_parse_worker, initargs=(config,))
@@ -0,0 +1,76 @@
+"""
+Prompt token 预算
+作用：用 tiktoken 计算 prompt 的 token 数；按给定的输入 token 预算反推每类能放多少条 few-shot 示例；
+      对同一批示例分别渲染压缩（数值按精度取整、去掉重复表头）前后的 prompt，统计实际节省的 token 数。
+"""
+import re
+
+import numpy as np
+
+from util import render_rows
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding('cl100k_base')
+except Exception:
+    # 未安装 tiktoken，或离线环境下无法下载编码文件
+    _ENCODING = None
+
+TOKENIZER_NAME = 'tiktoken/cl100k_base' if _ENCODING is not None else 'chars/4'
+
+_SLOT = re.compile(r'\{v\d+\}')
+
+
+def count_tokens(text):
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return len(text) // 4
+
+
+def mean_row_tokens(data, n_sample=256, seed=0):
+    """随机抽取部分行估计每条示例行的平均 token 数（使用独立的随机源，不影响全局采样）"""
+    rng = np.random.default_rng(seed)
+    idx = rng.choice(len(data), min(n_sample, len(data)), replace=False)
+    rows = render_rows(data.iloc[idx])
+    return float(np.mean([count_tokens(r) for r in rows]))
+
+
+def fit_samples_per_class(make_template, data, budget, nset, nclass, max_per_class):
+    """
+    make_template(n) -> 每类 n 条示例时的模板文本。
+    返回在 budget 之内的最大 n（至少 1，最多 max_per_class）。
+    """
+    row_tokens = mean_row_tokens(data)
+    overhead = count_tokens(_SLOT.sub('', make_template(max_per_class)))
+    n = int((budget - overhead) // (nset * nclass * row_tokens))
+    return max(1, min(n, max_per_class))
+
+
+class PromptTokenReport:
+    """
+    累计实际派发的 prompt token 数。
+    开启压缩时每个 prompt 同时传入同一批示例的未压缩渲染结果，报告实测的节省量；未开启时只报告总量。
+    """
+
+    def __init__(self):
+        self.n_prompts = 0
+        self.total_tokens = 0
+        self.baseline_tokens = 0
+
+    def observe(self, prompt_text, baseline_text=None):
+        self.n_prompts += 1
+        self.total_tokens += count_tokens(prompt_text)
+        if baseline_text is not None:
+            self.baseline_tokens += count_tokens(baseline_text)
+
+    @property
+    def mean_tokens(self):
+        return self.total_tokens / self.n_prompts if self.n_prompts else 0.0
+
+    def summary(self):
+        text = f"Prompt tokens ({TOKENIZER_NAME}): {self.mean_tokens:.0f} per prompt over {self.n_prompts} prompts"
+        if self.baseline_tokens:
+            baseline = self.baseline_tokens / self.n_prompts
+            saved = baseline - self.mean_tokens
+            text += f", uncompacted {baseline:.0f} (saved {saved:.0f} per prompt, {saved / baseline:.1%})"
+        return text
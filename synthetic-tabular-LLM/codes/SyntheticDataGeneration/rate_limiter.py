@@ -0,0 +1,155 @@
+"""
+令牌桶限流器
+作用：按 requests-per-minute / tokens-per-minute 两个令牌桶控制请求节奏，
+      并通过 httpx 的 response event hook 读取 `x-ratelimit-*` / `Retry-After`
+      响应头实时校正桶状态，替代固定的 time.sleep(60)。
+"""
+import asyncio
+import re
+import time
+from email.utils import parsedate_to_datetime
+
+_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNIT = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+def parse_duration(value):
+    """解析 `6m0s` / `20ms` / `1.5s` / `12` 这类 reset 时长，返回秒"""
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNIT[u] for n, u in parts)
+
+
+def parse_retry_after(value):
+    """Retry-After 可能是秒数，也可能是 HTTP-date"""
+    if value is None:
+        return None
+    seconds = parse_duration(value)
+    if seconds is not None:
+        return seconds
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """capacity 为每分钟额度；capacity=None 表示尚未知（不限流，等待响应头告知）"""
+
+    def __init__(self, capacity=None, period=60.0):
+        self.period = period
+        self.capacity = None
+        self.rate = None
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        if capacity is not None:
+            self.set_limit(capacity)
+            self.tokens = float(capacity)
+
+    def set_limit(self, capacity):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / self.period
+
+    def _refill(self, now):
+        if self.capacity is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        if self.capacity is None:
+            return 0.0
+        self._refill(now)
+        # 单次请求超过整桶容量时只要求桶满，避免永远等待
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        if self.capacity is not None:
+            self.tokens -= amount
+
+    def sync_remaining(self, remaining, now):
+        # 服务端的剩余额度才是真值：只向下校正，避免与本地在途请求重复计算
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+
+
+class RateLimiter:
+    def __init__(self, rpm=None, tpm=None):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self.n_throttled = 0
+        self._lock = None
+
+    async def acquire(self, n_tokens=0):
+        """等待直到 RPM / TPM 额度允许发出一个约 n_tokens 的请求"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = max(self.blocked_until - now,
+                           self.requests.wait_time(1, now),
+                           self.tokens.wait_time(n_tokens, now))
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(n_tokens)
+                    return
+                await asyncio.sleep(wait)
+
+    def penalty_remaining(self):
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    def update_from_headers(self, headers, status_code=None):
+        now = time.monotonic()
+        for bucket, kind in ((self.requests, 'requests'), (self.tokens, 'tokens')):
+            limit = headers.get(f'x-ratelimit-limit-{kind}')
+            remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+            try:
+                if limit is not None:
+                    was_unknown = bucket.capacity is None
+                    bucket._refill(now)
+                    bucket.set_limit(float(limit))
+                    if was_unknown:
+                        bucket.tokens = bucket.capacity
+                if remaining is not None and bucket.capacity is not None:
+                    bucket.sync_remaining(float(remaining), now)
+            except ValueError:
+                continue
+
+        retry_after = parse_retry_after(headers.get('retry-after'))
+        if status_code == 429:
+            self.n_throttled += 1
+            if retry_after is None:
+                retry_after = parse_duration(headers.get('x-ratelimit-reset-requests')) or 1.0
+        if retry_after is not None:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def _on_response(self, response):
+        self.update_from_headers(response.headers, response.status_code)
+
+    async def _aon_response(self, response):
+        self._on_response(response)
+
+    def sync_event_hooks(self):
+        """用于 httpx.Client(event_hooks=...)"""
+        return {'response': [self._on_response]}
+
+    def async_event_hooks(self):
+        """用于 httpx.AsyncClient(event_hooks=...)"""
+        return {'response': [self._aon_response]}
+
+
+def estimate_tokens(text, n_completion=0):
+    # 粗略估计：约 4 个字符一个 token，够用于限流预算
+    return len(text) // 4 + n_completion
@@ -0,0 +1,204 @@
+"""
+LLM 响应的磁盘缓存（按内容寻址）
+作用：包在 `template | llm | output_parser` 链外面，按 (模型名, temperature, 渲染后的 prompt, 第几次请求该 prompt)
+      的哈希存取响应文本。相同种子/配置重跑、只改解析逻辑重跑时不再重复计费；
+      replay 模式只读，缓存未命中直接报错，保证实验完全可复现。
+      按最近使用时间（文件 mtime）做 LRU 淘汰，总大小/条目数超过上限时删除最久未用的条目。
+"""
+import hashlib
+import json
+import os
+
+from async_engine import NonRetryableError
+
+CACHE_MODES = ('off', 'readwrite', 'replay')
+
+
+class CacheMissError(NonRetryableError):
+    """replay 模式下 prompt 不在缓存中"""
+
+
+def make_cache_key(model, temperature, prompt_text, sample_index=0):
+    payload = json.dumps([model, temperature, prompt_text, sample_index], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, cache_dir, max_bytes=None, max_entries=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # key -> [文件大小, 最近使用时间]
+        self._index = {}
+        for sub in os.listdir(cache_dir):
+            sub_dir = os.path.join(cache_dir, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for name in os.listdir(sub_dir):
+                if name.endswith('.json'):
+                    st = os.stat(os.path.join(sub_dir, name))
+                    self._index[name[:-5]] = [st.st_size, st.st_mtime]
+        self.total_bytes = sum(size for size, _ in self._index.values())
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, key):
+        if key not in self._index:
+            self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            # 被外部删除或写坏，按未命中处理
+            self._forget(key)
+            self.misses += 1
+            return None
+        os.utime(path)
+        self._index[key][1] = os.path.getmtime(path)
+        self.hits += 1
+        return record['response']
+
+    def put(self, key, response, meta=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'response': response, **(meta or {})}, f, ensure_ascii=False)
+        # 先写临时文件再替换，中途崩溃不会留下半个条目
+        os.replace(tmp_path, path)
+
+        if key in self._index:
+            self.total_bytes -= self._index[key][0]
+        st = os.stat(path)
+        self._index[key] = [st.st_size, st.st_mtime]
+        self.total_bytes += st.st_size
+        self.writes += 1
+        self._evict()
+
+    def _forget(self, key):
+        size, _ = self._index.pop(key)
+        self.total_bytes -= size
+
+    def _evict(self):
+        over_bytes = self.max_bytes is not None and self.total_bytes > self.max_bytes
+        over_entries = self.max_entries is not None and len(self._index) > self.max_entries
+        if not (over_bytes or over_entries):
+            return
+        for key, _ in sorted(self._index.items(), key=lambda kv: kv[1][1]):
+            if ((self.max_bytes is None or self.total_bytes <= self.max_bytes)
+                    and (self.max_entries is None or len(self._index) <= self.max_entries)):
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            self._forget(key)
+            self.evictions += 1
+
+    def summary(self):
+        return (f"cache: {self.hits} hits, {self.misses} misses, {self.writes} writes, "
+                f"{self.evictions} evicted, {len(self)} entries / {self.total_bytes / 2**20:.1f} MB")
+
+
+class CachedChain:
+    """
+    与原链接口一致（ainvoke / astream / invoke），可直接交给 AsyncGenerationEngine。
+    同一 prompt 在一次运行中被请求多次时（例如 HELOC 每批使用相同输入），
+    用出现次序 sample_index 区分，回放时按相同次序取回各自的响应。
+    config['metadata']['job_id'] 标识一个逻辑请求：它的重试沿用第一次分到的 sample_index，
+    不会把后续请求的次序挤后。
+    committed: 已提交到 checkpoint 的缓存键（续跑时传入），分配 sample_index 时跳过，
+    避免把已经用过的响应再取一次。
+    """
+
+    def __init__(self, chain, template, cache, model, temperature, mode='readwrite', committed=()):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode!r} (expected one of {CACHE_MODES})")
+        self.chain = chain
+        self.template = template
+        self.cache = cache
+        self.model = model
+        self.temperature = temperature
+        self.mode = mode
+        self.committed = set(committed)
+        self._seen = {}
+        # job_id -> 该请求分到的缓存键
+        self._job_keys = {}
+
+    def _key(self, inputs, config=None):
+        job_id = ((config or {}).get('metadata') or {}).get('job_id')
+        if job_id in self._job_keys:
+            return self._job_keys[job_id]
+        prompt_text = self.template.format(**inputs)
+        prompt_hash = hashlib.sha256(prompt_text.encode('utf-8')).hexdigest()
+        sample_index = self._seen.get(prompt_hash, 0)
+        key = make_cache_key(self.model, self.temperature, prompt_text, sample_index)
+        while key in self.committed:
+            sample_index += 1
+            key = make_cache_key(self.model, self.temperature, prompt_text, sample_index)
+        self._seen[prompt_hash] = sample_index + 1
+        if job_id is not None:
+            self._job_keys[job_id] = key
+        return key
+
+    def take_key(self, job_id):
+        """取出 job_id 对应的缓存键（提交批次时写入 checkpoint），之后不再保留"""
+        return self._job_keys.pop(job_id, None)
+
+    def _lookup(self, key):
+        if self.mode == 'off':
+            return None
+        response = self.cache.get(key)
+        if response is None and self.mode == 'replay':
+            raise CacheMissError(f"Response not in cache (replay mode): {key[:12]}")
+        return response
+
+    def _store(self, key, response):
+        if self.mode == 'readwrite':
+            self.cache.put(key, response, {'model': self.model, 'temperature': self.temperature})
+
+    async def ainvoke(self, inputs, config=None):
+        key = self._key(inputs, config)
+        response = self._lookup(key)
+        if response is None:
+            response = await self.chain.ainvoke(inputs)
+            self._store(key, response)
+        return response
+
+    def invoke(self, inputs, config=None):
+        key = self._key(inputs, config)
+        response = self._lookup(key)
+        if response is None:
+            response = self.chain.invoke(inputs)
+            self._store(key, response)
+        return response
+
+    async def astream(self, inputs, config=None):
+        key = self._key(inputs, config)
+        response = self._lookup(key)
+        if response is not None:
+            yield response
+            return
+        chunks = []
+        stream = self.chain.astream(inputs)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            await stream.aclose()
+        # 只缓存完整接收的响应；调用方提前结束时不会执行到这里
+        self._store(key, ''.join(chunks))
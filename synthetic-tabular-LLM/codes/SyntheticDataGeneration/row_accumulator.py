@@ -0,0 +1,31 @@
+"""
+解析结果的分块累积
+作用：替代循环里的 `df_all = pd.concat([df_all, df])`（每次都复制已有全部数据，整体 O(n^2)），
+      先收集分块，只在需要时 concat 一次；行数单独计数，循环判断不触发 concat。
+"""
+import pandas as pd
+
+
+class RowAccumulator:
+    def __init__(self):
+        self._chunks = []
+        self._frame = None
+        self.n_rows = 0
+
+    def append(self, df):
+        if df is None or len(df) == 0:
+            return
+        self._chunks.append(df)
+        self._frame = None
+        self.n_rows += len(df)
+
+    def __len__(self):
+        return self.n_rows
+
+    def to_frame(self):
+        """与逐次 pd.concat(axis=0) 的结果一致（保留各分块原索引）"""
+        if self._frame is None:
+            self._frame = pd.concat(self._chunks, axis=0) if self._chunks else pd.DataFrame()
+            # 合并后只保留一个分块，重复调用不会重复拷贝
+            self._chunks = [self._frame]
+        return self._frame
@@ -0,0 +1,104 @@
+"""
+流式增量 CSV 解析
+作用：在流式 API 返回 token 的同时逐行解析 LLM 输出：校验列数、用集合查找校验类别取值、
+      数值列直接转成 int/float，写入按列存放的缓冲区。替代每个响应一次的
+      parse_result（正则清洗 + pd.read_csv + 逐列 map 过滤），并允许在有效行足够时提前停止。
+"""
+import csv
+from collections import Counter
+
+import pandas as pd
+
+# 与 pd.read_csv 默认的缺失值标记保持一致（随后 dropna 会丢掉这些行）
+NA_VALUES = {'', 'nan', 'NaN', 'NA', 'N/A', 'n/a', 'null', 'NULL', 'None', '<NA>'}
+
+
+def _parse_number(x):
+    try:
+        return int(x)
+    except ValueError:
+        return float(x)
+
+
+class StreamingRowParser:
+    def __init__(self, col_name, categorical_features, unique_features, numeric_columns=(),
+                 name_cols=None, filter_flag=True, max_rows=None):
+        self.col_name = list(col_name)
+        self.n_cols = len(self.col_name)
+        self.header = name_cols.strip() if name_cols else None
+        self.max_rows = max_rows
+
+        # 类别列：str(原始值) -> 原始值，一次查表完成校验和类型还原
+        self.vocab = {}
+        if filter_flag:
+            for column in categorical_features:
+                if column in self.col_name and column in unique_features:
+                    self.vocab[self.col_name.index(column)] = {str(v): v for v in unique_features[column]}
+        numeric_columns = set(numeric_columns)
+        self.numeric_idx = [i for i, c in enumerate(self.col_name) if c in numeric_columns]
+
+        self.buffer = [[] for _ in range(self.n_cols)]
+        self.n_rows = 0
+        self.rejected = Counter()
+        self._partial = ''
+
+    def feed(self, chunk):
+        self._partial += chunk
+        if '\n' not in self._partial:
+            return
+        lines = self._partial.split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self._consume_line(line)
+
+    def close(self):
+        if self._partial:
+            self._consume_line(self._partial)
+            self._partial = ''
+
+    def should_stop(self):
+        return self.max_rows is not None and self.n_rows >= self.max_rows
+
+    def _consume_line(self, line):
+        line = line.strip()
+        if not line or line.startswith('```'):
+            return
+        if self.header is not None and self.header in line:
+            return
+        if self.should_stop():
+            self.rejected['surplus'] += 1
+            return
+
+        fields = next(csv.reader([line])) if '"' in line else line.split(',')
+        if len(fields) != self.n_cols:
+            self.rejected['column_count'] += 1
+            return
+        fields = [f.strip() for f in fields]
+        if any(f in NA_VALUES for f in fields):
+            # 与 read_csv + dropna 一致：有缺失值的行丢弃
+            self.rejected['missing'] += 1
+            return
+
+        invalid = [i for i, values in self.vocab.items() if fields[i] not in values]
+        if invalid:
+            # 与 parse_result 的统计一致：一行中每个取值不合法的列各计一次
+            for i in invalid:
+                self.rejected[self.col_name[i]] += 1
+            return
+        for i, values in self.vocab.items():
+            fields[i] = values[fields[i]]
+        for i in self.numeric_idx:
+            if i in self.vocab:
+                continue
+            try:
+                fields[i] = _parse_number(fields[i])
+            except ValueError:
+                self.rejected['numeric'] += 1
+                return
+
+        for column_buffer, value in zip(self.buffer, fields):
+            column_buffer.append(value)
+        self.n_rows += 1
+
+    def to_frame(self):
+        return pd.DataFrame(dict(zip(self.col_name, self.buffer)), columns=self.col_name)
@@ -1,12 +1,15 @@
+import copy
 import numpy as np
 import pandas as pd
 from io import StringIO
 import re
 
-def get_prompt_conclass(inital_prompt, numbering, n_samples_per_class,nclass,nset, name_cols):
+def get_prompt_conclass(inital_prompt, numbering, n_samples_per_class,nclass,nset, name_cols, repeat_header=True):
+    # repeat_header=False 时表头只在第一组示例前和最后的生成位置出现，宽表可省下大量 token
     prompt=""
     for i in range(nset):
-        prompt+=name_cols
+        if repeat_header or i == 0:
+            prompt+=name_cols
         for j in range(nclass):
             prompt+=f'{numbering[j]}.\n'
             for k in range(n_samples_per_class):
@@ -18,25 +21,38 @@ def get_prompt_conclass(inital_prompt, numbering, n_samples_per_class,nclass,nse
     prompt = inital_prompt+prompt
     return prompt
     
-def filtering_categorical(result_df, categorical_features, unique_features):
-    org_df = result_df.copy()
-    shape_before = org_df.shape
-    
-    for column in categorical_features:
-        # 安全检查：如果列不存在，打印警告并跳过，防止报错
+def compile_vocabularies(unique_features, categorical_features=None):
+    """把 get_unique_features 的结果编译成 pd.Index（哈希查找），整个生成过程只需编译一次"""
+    return {column: pd.Index(values) for column, values in unique_features.items()
+            if categorical_features is None or column in categorical_features}
+
+def filter_categorical_vectorized(result_df, vocabularies):
+    """
+    所有类别列合成一个布尔掩码后只做一次行筛选。
+    返回 (过滤后的 DataFrame, {列名: 该列取值不合法的行数})
+    """
+    keep = np.ones(len(result_df), dtype=bool)
+    rejected = {}
+    for column, vocab in vocabularies.items():
         if column not in result_df.columns:
-            # print(f"⚠️ Warning: Column '{column}' missing in generated data. Skipping filter.")
             continue
+        values = result_df[column]
+        if pd.api.types.is_numeric_dtype(vocab) and not pd.api.types.is_numeric_dtype(values):
+            # 数值型类别（如 Target 0/1）可能被解析成字符串，先转成数值再比较
+            values = pd.to_numeric(values, errors='coerce')
+        valid = values.isin(vocab).to_numpy()
+        rejected[column] = int((~valid).sum())
+        keep &= valid
+    return result_df[keep], rejected
 
-        try:
-            if column=='Target':
-                result_df = result_df[result_df[column].map(lambda x: int(x) in unique_features[column])]
-            else:
-                result_df = result_df[result_df[column].map(lambda x: x in unique_features[column])]
-        except Exception as e:
-            # 忽略单个值的映射错误
-            continue
-        
+def filtering_categorical(result_df, categorical_features, unique_features, vocabularies=None, report=None):
+    if vocabularies is None:
+        vocabularies = compile_vocabularies(unique_features, categorical_features)
+    result_df, rejected = filter_categorical_vectorized(result_df, vocabularies)
+    if report is not None:
+        # 累计各列的拒绝行数，便于查看行被丢弃的原因
+        for column, n in rejected.items():
+            report[column] = report.get(column, 0) + n
     return result_df
     
 def parse_prompt2df(one_prompt, split, inital_prompt, col_name):
@@ -51,7 +67,8 @@ def parse_prompt2df(one_prompt, split, inital_prompt, col_name):
 # -------------------------------------------------------------------
 # 🚀【核心修改】更稳健的 parse_result (强制列名 + Debug打印)
 # -------------------------------------------------------------------
-def parse_result(one_prompt, name_cols, col_name, categorical_features, unique_features, filter_flag=True):
+def parse_result(one_prompt, name_cols, col_name, categorical_features, unique_features, filter_flag=True,
+                 vocabularies=None, report=None):
     text = one_prompt
     
     # 1. 清洗 Markdown
@@ -98,7 +115,8 @@ def parse_result(one_prompt, name_cols, col_name, categorical_features, unique_f
         if len(result_df) > 0:
             # 只有当列名都存在时才进行过滤，防止 KeyError
             if filter_flag:
-                result_df = filtering_categorical(result_df, categorical_features, unique_features)
+                result_df = filtering_categorical(result_df, categorical_features, unique_features,
+                                                  vocabularies=vocabularies, report=report)
             
         return result_df
         
@@ -135,28 +153,107 @@ def get_sampleidx_from_data(unique_features, target, n_samples_total, n_batch, n
     random_idx_batch_list = np.concatenate(random_idx_batch_list, axis=2)
     return random_idx_batch_list, target_df_list
 
+def numeric_precision(series, max_decimals=6):
+    """数据中实际出现的小数位数：能被 round(d) 精确还原的最小 d（最多 max_decimals 位）"""
+    values = series.to_numpy(dtype=float)
+    values = values[np.isfinite(values)]
+    for d in range(max_decimals + 1):
+        if np.allclose(np.round(values, d), values, rtol=0, atol=10.0**-(max_decimals + 2)):
+            return d
+    return max_decimals
+
+def quantize_numeric(df, exclude=(), max_decimals=6):
+    """
+    浮点列按实际精度取整后再渲染进 prompt：35.0 -> 35，0.30000000000000004 -> 0.3。
+    返回新的 DataFrame，exclude 中的列（类别列）保持不变。
+    """
+    df = df.copy()
+    for c in df.columns:
+        if c in exclude or not pd.api.types.is_float_dtype(df[c]):
+            continue
+        d = numeric_precision(df[c], max_decimals)
+        if d == 0 and not df[c].isna().any():
+            df[c] = df[c].round().astype('int64')
+        else:
+            df[c] = df[c].round(d)
+    return df
+
+def render_rows(df):
+    """把每一行预先渲染成 prompt 里的 CSV 字符串，与 fv_cols.format(*row) 的输出一致"""
+    cols = [df[c].astype(str) for c in df.columns]
+    rendered = cols[0].str.cat(cols[1:], sep=',') + '\n'
+    return rendered.to_numpy(dtype=object)
+
+class ClassRowIndex:
+    """
+    训练数据的类别索引，整个生成过程只构建一次：每类的行位置 + 预渲染的行字符串。
+    之后每个批次只做随机下标采样和 NumPy 索引，不再对 data 做布尔筛选。
+    """
+    def __init__(self, data, target, classes):
+        self.classes = list(classes)
+        class_codes = pd.Index(self.classes).get_indexer(data[target])
+        rendered_all = render_rows(data)
+        self.positions = [np.flatnonzero(class_codes == j) for j in range(len(self.classes))]
+        self.rendered = [rendered_all[p] for p in self.positions]
+
+    def sample(self, n_batch, nset, n_per_class, slot_classes=None):
+        """
+        返回 [n_batch, nset, nclass, n_per_class] 的类内下标，与 get_sampleidx_from_data 的采样方式一致。
+        slot_classes: prompt 中每个类别分组从哪一类抽样（类别位置列表），默认第 j 组对应第 j 类
+        """
+        n_samples_total = n_batch * nset * n_per_class
+        random_idx_batch_list = []
+        for rows in self._slot_rows(slot_classes):
+            replace_flag = len(rows) < n_samples_total
+            random_idx_batch = np.random.choice(len(rows), n_samples_total, replace=replace_flag)
+            random_idx_batch_list.append(random_idx_batch.reshape(n_batch, nset, 1, n_per_class))
+        return np.concatenate(random_idx_batch_list, axis=2)
+
+    def _slot_rows(self, slot_classes):
+        if slot_classes is None:
+            return self.rendered
+        return [self.rendered[j] for j in slot_classes]
+
+    def inputs_from_sample(self, random_idx_batch_list, slot_classes=None):
+        """按 sample() 得到的下标取出预渲染的行，组成模板输入"""
+        n_batch, nset, nclass, n_per_class = random_idx_batch_list.shape
+        rendered = self._slot_rows(slot_classes)
+        return get_input_from_rendered(rendered, random_idx_batch_list, n_batch, n_per_class, nset, nclass)
+
+    def build_inputs(self, n_batch, nset, n_per_class, slot_classes=None):
+        random_idx_batch_list = self.sample(n_batch, nset, n_per_class, slot_classes)
+        return self.inputs_from_sample(random_idx_batch_list, slot_classes)
+
+    def rerender(self, data):
+        """类别划分不变，改用 data（与构建时行顺序相同）渲染示例行；用于渲染同一批示例在压缩前的 prompt"""
+        other = copy.copy(self)
+        rendered_all = render_rows(data)
+        other.rendered = [rendered_all[p] for p in self.positions]
+        return other
+
+def get_input_from_rendered(rendered_list, random_idx_batch_list, n_batch, n_samples_per_class, nset, nclass):
+    # slots[b, i, j, k] 按 C 顺序展平后正好对应 v{i*(n_samples_per_class*nclass)+j*n_samples_per_class+k}
+    slots = np.empty((n_batch, nset, nclass, n_samples_per_class), dtype=object)
+    for j in range(nclass):
+        slots[:, :, j, :] = rendered_list[j][random_idx_batch_list[:, :, j, :]]
+    keys = [f'v{n}' for n in range(nset*nclass*n_samples_per_class)]
+    return [dict(zip(keys, row)) for row in slots.reshape(n_batch, -1)]
+
 def get_input_from_idx(target_df_list, random_idx_batch_list, data, n_batch, n_samples_per_class, nset, nclass ):
-    fv_cols = ('{},'*len(data.columns))[:-1] + '\n' 
-    inputs_batch = []
-    for batch_idx in range(n_batch):
-        inputs = {}
-        for i in range(nset): 
-            for j in range(nclass): 
-                target_df = target_df_list[j]
-                for k in range(n_samples_per_class): 
-                    idx = random_idx_batch_list[batch_idx, i,j,k]
-                    inputs[f'v{i*(n_samples_per_class*nclass)+j*n_samples_per_class+k}']=fv_cols.format(
-                        *target_df.iloc[idx].values
-                    )
-        inputs_batch.append(inputs)
-    return inputs_batch
+    rendered_list = [render_rows(target_df) for target_df in target_df_list]
+    return get_input_from_rendered(rendered_list, random_idx_batch_list, n_batch, n_samples_per_class, nset, nclass)
     
 def make_final_prompt(unique_categorical_features, TARGET, data, template1_prompt,
-                      N_SAMPLES_TOTAL, N_BATCH, N_SAMPLES_PER_CLASS, N_SET, NAME_COLS, N_CLASS):
+                      N_SAMPLES_TOTAL, N_BATCH, N_SAMPLES_PER_CLASS, N_SET, NAME_COLS, N_CLASS, class_index=None,
+                      slot_classes=None):
     
-    random_idx_batch_list, target_df_list = get_sampleidx_from_data(unique_categorical_features, TARGET, 
-                                                                    N_SAMPLES_TOTAL, N_BATCH, N_SAMPLES_PER_CLASS, N_SET, NAME_COLS, data)
-    inputs_batch = get_input_from_idx(target_df_list, random_idx_batch_list, data, N_BATCH, N_SAMPLES_PER_CLASS, N_SET, N_CLASS)
+    if class_index is None:
+        random_idx_batch_list, target_df_list = get_sampleidx_from_data(unique_categorical_features, TARGET, 
+                                                                        N_SAMPLES_TOTAL, N_BATCH, N_SAMPLES_PER_CLASS, N_SET, NAME_COLS, data)
+        inputs_batch = get_input_from_idx(target_df_list, random_idx_batch_list, data, N_BATCH, N_SAMPLES_PER_CLASS, N_SET, N_CLASS)
+    else:
+        # 复用预先构建的 ClassRowIndex，跳过逐类布尔筛选和行渲染
+        inputs_batch = class_index.build_inputs(N_BATCH, N_SET, N_SAMPLES_PER_CLASS, slot_classes)
     final_prompt = template1_prompt.batch(inputs_batch)
     return final_prompt, inputs_batch
 
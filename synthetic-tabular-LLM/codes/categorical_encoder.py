@@ -0,0 +1,79 @@
+"""
+类别特征编码器
+作用：一次扫描学习所有类别列的取值表，把整张表向量化地转换成 int32 编码，
+      取代逐列 `LabelEncoder().fit(...astype(str))` 的写法；未见过的取值统一编码为 UNKNOWN。
+      取值按字符串排序，编码与 LabelEncoder 的 classes_ 顺序一致。
+      每次评估单独拟合（编码只取决于本次评估的数据），取值表可保存为 JSON，之后加载即可复现同样的编码。
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN = -1
+
+
+def infer_categorical_columns(df, max_unique=10):
+    """object 列，以及取值少于 max_unique 的列（run_dl_* 脚本的规则）；max_unique=None 时只取 object 列"""
+    return [c for c in df.columns
+            if df[c].dtype == 'object' or (max_unique is not None and df[c].nunique() < max_unique)]
+
+
+def _as_str(series):
+    # 与原来的 LabelEncoder 用法一致：按字符串比较，NaN 记为 'nan'
+    # （pandas 3 的 astype(str) 会保留缺失值，这里逐元素经 NumPy 转换）
+    return pd.Series(series.to_numpy(dtype=object).astype(str), index=series.index, dtype=object)
+
+
+class CategoricalEncoder:
+    def __init__(self, vocabularies=None):
+        # 列名 -> 排序后的取值；编码即取值在其中的位置
+        self.vocabularies = {c: pd.Index(v, dtype=object) for c, v in (vocabularies or {}).items()}
+
+    @property
+    def columns(self):
+        return list(self.vocabularies)
+
+    def fit(self, columns, *frames):
+        self.vocabularies = {}
+        return self.partial_fit(columns, *frames)
+
+    def partial_fit(self, columns, *frames):
+        """在已有取值表上补充 frames 中的新取值（仍保持排序）"""
+        for c in columns:
+            values = [_as_str(f[c]).unique() for f in frames if c in f.columns]
+            if c in self.vocabularies:
+                values.append(self.vocabularies[c].to_numpy())
+            merged = np.unique(np.concatenate(values)) if values else []
+            self.vocabularies[c] = pd.Index(merged, dtype=object)
+        return self
+
+    def transform(self, df):
+        """返回副本：类别列替换为 int32 编码，其余列不变"""
+        df = df.copy()
+        for c in self.columns:
+            if c in df.columns:
+                df[c] = self.vocabularies[c].get_indexer(_as_str(df[c])).astype(np.int32)
+        return df
+
+    def fit_transform(self, columns, df):
+        return self.fit(columns, df).transform(df)
+
+    def n_unknown(self, df):
+        """各列未见过的取值个数（即被编码为 UNKNOWN 的行数）"""
+        return {c: int((self.vocabularies[c].get_indexer(_as_str(df[c])) < 0).sum())
+                for c in self.columns if c in df.columns}
+
+    def save(self, path):
+        state = {c: v.tolist() for c, v in self.vocabularies.items()}
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=1)
+        # 先写临时文件再替换，中途崩溃不会留下半个文件
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
@@ -0,0 +1,132 @@
+"""
+数据集读取（带列式二进制缓存）
+作用：read_table(path) 返回与 pd.read_csv 相同取值和类型的 DataFrame，
+      第一次读取时把解析结果按列写入同目录下的 .table_cache/<文件名>/：
+      数值/布尔列直接保存为 .npy，字符串列保存为 int32 编码 .npy + 取值表；之后按 mmap 读取，不再解析 CSV。
+      源文件大小或修改时间变化时比较内容哈希，内容确实改变才重新解析。
+      设置环境变量 EPIC_TABLE_CACHE=0 可关闭缓存。
+      索引统一处理：第一列是 'index'（真实数据 X_* / y_*）或 'synindex'（EPIC 生成样本）时作为行索引，
+      否则使用默认的 RangeIndex；调用方不再各自指定 index_col 或手动删除 index 列。
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIRNAME = '.table_cache'
+CACHE_VERSION = 1
+# 仓库内 CSV 的行索引列名（写出时的 index_label）
+INDEX_COLUMNS = ('index', 'synindex')
+
+
+def _cache_dir(path):
+    return os.path.join(os.path.dirname(path), CACHE_DIRNAME, os.path.basename(path))
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _load_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_meta(cache_dir, meta):
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    tmp_path = f'{meta_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+
+
+def _write_cache(df, cache_dir, meta):
+    # 先写到临时目录再整体改名，并行读取的进程不会看到写了一半的缓存
+    tmp_dir = f'{cache_dir}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = []
+    for j, c in enumerate(df.columns):
+        s = df[c]
+        entry = {'name': c, 'file': f'{j}.npy'}
+        if pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype):
+            # NaN 编码为 -1；dtype 记录 read_csv 给出的类型（object 或 str），读取时还原
+            codes, categories = pd.factorize(s)
+            np.save(os.path.join(tmp_dir, entry['file']), codes.astype(np.int32))
+            entry['categories'] = categories.tolist()
+            entry['dtype'] = str(s.dtype)
+        else:
+            np.save(os.path.join(tmp_dir, entry['file']), s.to_numpy())
+        columns.append(entry)
+    _save_meta(tmp_dir, {**meta, 'columns': columns})
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    try:
+        os.rename(tmp_dir, cache_dir)
+    except OSError:
+        # 另一个进程刚写好了同样的缓存
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _read_cache(cache_dir, meta):
+    data = {}
+    for entry in meta['columns']:
+        values = np.load(os.path.join(cache_dir, entry['file']), mmap_mode='r')
+        if 'categories' in entry:
+            # 取值表末尾补一个 NaN，编码 -1 正好取到它
+            categories = np.array(entry['categories'] + [np.nan], dtype=object)
+            values = pd.array(categories[values], dtype=entry['dtype'])
+        data[entry['name']] = values
+    return pd.DataFrame(data, columns=[entry['name'] for entry in meta['columns']])
+
+
+def _read_full(path):
+    path = os.path.abspath(path)
+    if os.environ.get('EPIC_TABLE_CACHE', '1') == '0':
+        return pd.read_csv(path)
+
+    cache_dir = _cache_dir(path)
+    st = os.stat(path)
+    meta = _load_meta(cache_dir)
+    if meta is not None and meta.get('version') == CACHE_VERSION and meta['size'] == st.st_size:
+        if meta['mtime_ns'] == st.st_mtime_ns:
+            return _read_cache(cache_dir, meta)
+        if meta['sha256'] == _file_hash(path):
+            # 只是修改时间变了（例如 git checkout），内容相同
+            meta['mtime_ns'] = st.st_mtime_ns
+            _save_meta(cache_dir, meta)
+            return _read_cache(cache_dir, meta)
+
+    df = pd.read_csv(path)
+    meta = {'version': CACHE_VERSION, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': _file_hash(path)}
+    try:
+        os.makedirs(os.path.dirname(cache_dir), exist_ok=True)
+        _write_cache(df, cache_dir, meta)
+    except (OSError, TypeError, ValueError) as e:
+        # 只读目录或无法序列化的取值：不缓存，直接返回解析结果
+        print(f"⚠️ 无法写入缓存 {cache_dir}: {e}")
+    return df
+
+
+def read_table(path):
+    """读取 CSV；第一列为 INDEX_COLUMNS 之一时设为行索引（等价于 pd.read_csv(path, index_col=0)）"""
+    df = _read_full(str(path))
+    if len(df.columns) > 0 and df.columns[0] in INDEX_COLUMNS:
+        return df.set_index(df.columns[0])
+    return df
+
+
+def load_realdata(data_dir):
+    """读取 X_train / y_train / X_test / y_test，索引为 'index' 列"""
+    return tuple(read_table(os.path.join(data_dir, f'{name}.csv'))
+                 for name in ('X_train', 'y_train', 'X_test', 'y_test'))
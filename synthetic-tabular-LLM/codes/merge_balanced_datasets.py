@@ -13,6 +13,7 @@
 import pandas as pd
 import os
 from pathlib import Path
+from dataset_loader import read_table
 
 # 配置路径
 BASE_DIR = Path('../data')
@@ -65,12 +66,9 @@ def load_original_data(dataset_name, config):
     print(f"\n{'='*60}")
     print(f"📂 加载 {dataset_name} 原始训练数据...")
     
-    X_train = pd.read_csv(config['X_train'])
-    y_train = pd.read_csv(config['y_train'])
-    
-    # 移除可能存在的 index 列
-    if 'index' in y_train.columns:
-        y_train = y_train.drop('index', axis=1)
+    # 'index' 列由 read_table 设为行索引，X 与 y 按索引对齐合并
+    X_train = read_table(config['X_train'])
+    y_train = read_table(config['y_train'])
     
     # 合并 X 和 y
     target_column = config['target_column']
@@ -147,7 +145,7 @@ def process_dataset(dataset_name, config):
             continue
         
         # 加载合成数据
-        synthetic_data = pd.read_csv(syn_file)
+        synthetic_data = read_table(syn_file)
         
         # 合并并平衡
         balanced_data = merge_and_balance(
@@ -11,6 +11,8 @@ from sdv.metadata import SingleTableMetadata
 from xgboost import XGBClassifier
 from sklearn.metrics import f1_score, classification_report
 from sklearn.preprocessing import LabelEncoder
+from categorical_encoder import CategoricalEncoder, infer_categorical_columns
+from dataset_loader import load_realdata
 
 warnings.filterwarnings('ignore')
 
@@ -31,10 +33,8 @@ print("="*60, flush=True)
 
 print("\n📂 [1/5] 正在读取原始数据...", flush=True)
 try:
-    X_train = pd.read_csv(f'{DATA_DIR}/X_train.csv', index_col=0)
-    y_train = pd.read_csv(f'{DATA_DIR}/y_train.csv', index_col=0)
-    X_test = pd.read_csv(f'{DATA_DIR}/X_test.csv', index_col=0)
-    y_test = pd.read_csv(f'{DATA_DIR}/y_test.csv', index_col=0).values.ravel()
+    X_train, y_train, X_test, y_test = load_realdata(DATA_DIR)
+    y_test = y_test.values.ravel()
     
     print(f"   ✅ 训练集: {X_train.shape[0]} 条")
     print(f"   ✅ 测试集: {X_test.shape[0]} 条")
@@ -42,6 +42,9 @@ try:
     
     # 合并 X 和 y，因为生成模型需要学习整张表
     train_data = pd.concat([X_train, y_train], axis=1)
+
+    # 类别特征（object 列或取值少于 10 个的列）
+    CATEGORICAL_COLUMNS = infer_categorical_columns(X_train)
     
     # 查看类别分布
     print(f"\n   📊 训练集类别分布:")
@@ -66,7 +69,7 @@ metadata.detect_from_dataframe(train_data)
 print("   ✅ 元数据检测完成")
 
 # 定义一个通用的评估函数
-def evaluate_synthetic_data(name, synthetic_data):
+def evaluate_synthetic_data(name, synthetic_data, encoder_path):
     print(f"\n📊 正在评估 {name} 生成的数据质量...")
     
     # 1. 准备合成数据的 X 和 y
@@ -77,28 +80,16 @@ def evaluate_synthetic_data(name, synthetic_data):
     print(f"   生成数据类别分布: {y_syn.value_counts().to_dict()}")
     
     # 2. 数据预处理 (转数字)
-    # 合并所有数据以统一编码
-    full_X = pd.concat([X_train, X_test, X_syn], axis=0)
-    
-    # 训练编码器
-    encoders = {}
-    for col in X_train.columns:
-        if X_train[col].dtype == 'object' or X_train[col].nunique() < 10:
-            le = LabelEncoder()
-            full_X[col] = full_X[col].astype(str).fillna('Missing')
-            le.fit(full_X[col])
-            
-            # 转换合成数据
-            X_syn[col] = le.transform(X_syn[col].astype(str).fillna('Missing'))
-            encoders[col] = le
+    # 每次评估单独拟合取值表（覆盖真实数据与本次合成数据），与合成样本放在一起
+    encoder = CategoricalEncoder().fit(CATEGORICAL_COLUMNS, X_train, X_test, X_syn)
+    encoder.save(encoder_path)
+    X_syn = encoder.transform(X_syn)
     
     # 转换标签
     y_syn_enc = le_y.transform(y_syn)
     
     # 3. 混合数据训练 (Real + Synthetic)
-    X_train_enc = X_train.copy()
-    for col, le in encoders.items():
-        X_train_enc[col] = le.transform(X_train_enc[col].astype(str).fillna('Missing'))
+    X_train_enc = encoder.transform(X_train)
         
     X_final = pd.concat([X_train_enc, X_syn], axis=0)
     y_final = np.concatenate([le_y.transform(y_train.values.ravel()), y_syn_enc])
@@ -110,9 +101,7 @@ def evaluate_synthetic_data(name, synthetic_data):
     model.fit(X_final, y_final)
     
     # 5. 预测
-    X_test_encoded = X_test.copy()
-    for col, le in encoders.items():
-        X_test_encoded[col] = le.transform(X_test_encoded[col].astype(str).fillna('Missing'))
+    X_test_encoded = encoder.transform(X_test)
         
     y_pred = model.predict(X_test_encoded)
     
@@ -137,7 +126,8 @@ syn_ctgan = ctgan.sample(num_rows=SAMPLES_TO_GENERATE)
 syn_ctgan.to_csv(f"{SAVE_DIR}/Travel_CTGAN_samples.csv", index=False)
 print(f"   ✅ 数据已保存到: {SAVE_DIR}/Travel_CTGAN_samples.csv")
 
-f1_ctgan = evaluate_synthetic_data("CTGAN", syn_ctgan)
+f1_ctgan = evaluate_synthetic_data("CTGAN", syn_ctgan,
+                                   f"{SAVE_DIR}/Travel_CTGAN_samples_categorical_encoder.json")
 print(f"\n🏆 CTGAN (Real+Syn) F1 Score: {f1_ctgan:.4f}")
 
 # ===========================================
@@ -158,7 +148,8 @@ syn_tvae = tvae.sample(num_rows=SAMPLES_TO_GENERATE)
 syn_tvae.to_csv(f"{SAVE_DIR}/Travel_TVAE_samples.csv", index=False)
 print(f"   ✅ 数据已保存到: {SAVE_DIR}/Travel_TVAE_samples.csv")
 
-f1_tvae = evaluate_synthetic_data("TVAE", syn_tvae)
+f1_tvae = evaluate_synthetic_data("TVAE", syn_tvae,
+                                  f"{SAVE_DIR}/Travel_TVAE_samples_categorical_encoder.json")
 print(f"\n🏆 TVAE (Real+Syn) F1 Score: {f1_tvae:.4f}")
 
 # ===========================================
@@ -13,6 +13,8 @@ from sdv.single_table import CTGANSynthesizer, TVAESynthesizer
 from sdv.metadata import SingleTableMetadata
 from sdv.sampling import Condition
 from sklearn.preprocessing import LabelEncoder
+from categorical_encoder import CategoricalEncoder, infer_categorical_columns
+from dataset_loader import load_realdata
 from xgboost import XGBClassifier
 from sklearn.metrics import f1_score, balanced_accuracy_score, classification_report
 import time
@@ -37,20 +39,8 @@ print("=" * 80, flush=True)
 # 1. 加载数据
 # ============================================================================
 print("\n📂 加载数据...", flush=True)
-X_train = pd.read_csv('../data/realdata/HELOC/X_train.csv')
-y_train = pd.read_csv('../data/realdata/HELOC/y_train.csv')
-X_test = pd.read_csv('../data/realdata/HELOC/X_test.csv')
-y_test = pd.read_csv('../data/realdata/HELOC/y_test.csv')
-
-# 删除 index 列（如果存在）
-if 'index' in X_train.columns:
-    X_train = X_train.drop('index', axis=1)
-if 'index' in X_test.columns:
-    X_test = X_test.drop('index', axis=1)
-if 'index' in y_train.columns:
-    y_train = y_train.drop('index', axis=1)
-if 'index' in y_test.columns:
-    y_test = y_test.drop('index', axis=1)
+# 'index' 列由 load_realdata 设为行索引，不会混入特征
+X_train, y_train, X_test, y_test = load_realdata('../data/realdata/HELOC')
 
 # 合并 X 和 y
 train_data = pd.concat([X_train, y_train], axis=1)
@@ -87,17 +77,10 @@ def evaluate_model(name, X_train_eval, y_train_eval, X_test_eval, y_test_eval):
     print(f"📊 评估: {name}", flush=True)
     print(f"{'='*60}", flush=True)
     
-    # 编码分类特征
-    label_encoders = {}
-    X_train_encoded = X_train_eval.copy()
-    X_test_encoded = X_test_eval.copy()
-    
-    for col in X_train_encoded.columns:
-        if X_train_encoded[col].dtype == 'object':
-            le = LabelEncoder()
-            X_train_encoded[col] = le.fit_transform(X_train_encoded[col].astype(str))
-            X_test_encoded[col] = le.transform(X_test_encoded[col].astype(str))
-            label_encoders[col] = le
+    # 编码分类特征（object 列；只在训练集上学习取值表，测试集中未见过的取值编码为 UNKNOWN）
+    encoder = CategoricalEncoder().fit(infer_categorical_columns(X_train_eval, max_unique=None), X_train_eval)
+    X_train_encoded = encoder.transform(X_train_eval)
+    X_test_encoded = encoder.transform(X_test_eval)
     
     # 编码目标变量
     le_target = LabelEncoder()
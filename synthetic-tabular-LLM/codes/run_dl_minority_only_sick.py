@@ -17,6 +17,8 @@ from sdv.sampling import Condition
 from xgboost import XGBClassifier
 from sklearn.metrics import f1_score, balanced_accuracy_score, classification_report
 from sklearn.preprocessing import LabelEncoder
+from categorical_encoder import CategoricalEncoder, infer_categorical_columns
+from dataset_loader import load_realdata
 
 warnings.filterwarnings('ignore')
 
@@ -33,10 +35,8 @@ print("=" * 70, flush=True)
 
 # 1. 读取数据
 print("\n[1/7] 正在读取数据...", flush=True)
-X_train = pd.read_csv(f'{DATA_DIR}/X_train.csv', index_col=0)
-y_train = pd.read_csv(f'{DATA_DIR}/y_train.csv', index_col=0)
-X_test = pd.read_csv(f'{DATA_DIR}/X_test.csv', index_col=0)
-y_test = pd.read_csv(f'{DATA_DIR}/y_test.csv', index_col=0).values.ravel()
+X_train, y_train, X_test, y_test = load_realdata(DATA_DIR)
+y_test = y_test.values.ravel()
 
 print(f"   训练集: {X_train.shape[0]} 条, 测试集: {X_test.shape[0]} 条", flush=True)
 
@@ -56,6 +56,9 @@ samples_needed = int(majority_count - minority_count)  # 转换为 Python int
 
 print(f"\n   🎯 需要生成 {samples_needed} 条 '{MINORITY_CLASS}' 样本以平衡数据集", flush=True)
 
+# 类别特征（object 列或取值少于 10 个的列）
+CATEGORICAL_COLUMNS = infer_categorical_columns(X_train)
+
 # 标签编码
 le_y = LabelEncoder()
 y_test_enc = le_y.fit_transform(y_test)
@@ -68,7 +71,7 @@ metadata.detect_from_dataframe(train_data)
 print("   ✅ 元数据检测完成", flush=True)
 
 # 评估函数
-def evaluate_balanced_data(name, synthetic_minority_data):
+def evaluate_balanced_data(name, synthetic_minority_data, encoder_path):
     """评估使用合成少数类样本平衡后的数据"""
     print(f"\n   📊 评估 {name} 生成的平衡数据...")
     
@@ -89,21 +92,10 @@ def evaluate_balanced_data(name, synthetic_minority_data):
     for cls, count in balanced_counts.items():
         print(f"      {cls}: {count} 条 ({count/len(y_balanced)*100:.2f}%)")
     
-    # 3. 数据编码
-    full_X = pd.concat([X_balanced, X_test], axis=0)
-    encoders = {}
-    
-    for col in X_train.columns:
-        if X_train[col].dtype == 'object' or X_train[col].nunique() < 10:
-            le = LabelEncoder()
-            full_X[col] = full_X[col].astype(str).fillna('Missing')
-            le.fit(full_X[col])
-            encoders[col] = le
-    
-    # 编码训练数据
-    X_balanced_enc = X_balanced.copy()
-    for col, le in encoders.items():
-        X_balanced_enc[col] = le.transform(X_balanced_enc[col].astype(str).fillna('Missing'))
+    # 3. 数据编码（每次评估单独拟合取值表，与合成样本放在一起）
+    encoder = CategoricalEncoder().fit(CATEGORICAL_COLUMNS, X_balanced, X_test)
+    encoder.save(encoder_path)
+    X_balanced_enc = encoder.transform(X_balanced)
     
     y_balanced_enc = le_y.transform(y_balanced.values.ravel())
     
@@ -112,9 +104,7 @@ def evaluate_balanced_data(name, synthetic_minority_data):
     model.fit(X_balanced_enc, y_balanced_enc)
     
     # 5. 预测
-    X_test_encoded = X_test.copy()
-    for col, le in encoders.items():
-        X_test_encoded[col] = le.transform(X_test_encoded[col].astype(str).fillna('Missing'))
+    X_test_encoded = encoder.transform(X_test)
     
     y_pred = model.predict(X_test_encoded)
     
@@ -162,7 +152,8 @@ print(f"   {dict(syn_ctgan_minority[TARGET_COLUMN].value_counts())}")
 syn_ctgan_minority.to_csv(f"{SAVE_DIR}/Sick_CTGAN_minority_only.csv", index=False)
 print(f"   ✅ 已保存: {SAVE_DIR}/Sick_CTGAN_minority_only.csv")
 
-f1_ctgan, ba_ctgan = evaluate_balanced_data("CTGAN (条件采样)", syn_ctgan_minority)
+f1_ctgan, ba_ctgan = evaluate_balanced_data("CTGAN (条件采样)", syn_ctgan_minority,
+                                            f"{SAVE_DIR}/Sick_CTGAN_minority_only_categorical_encoder.json")
 
 # ===========================================
 # 🤖 方法 2: TVAE 条件采样
@@ -191,7 +182,8 @@ print(f"   {dict(syn_tvae_minority[TARGET_COLUMN].value_counts())}")
 syn_tvae_minority.to_csv(f"{SAVE_DIR}/Sick_TVAE_minority_only.csv", index=False)
 print(f"   ✅ 已保存: {SAVE_DIR}/Sick_TVAE_minority_only.csv")
 
-f1_tvae, ba_tvae = evaluate_balanced_data("TVAE (条件采样)", syn_tvae_minority)
+f1_tvae, ba_tvae = evaluate_balanced_data("TVAE (条件采样)", syn_tvae_minority,
+                                          f"{SAVE_DIR}/Sick_TVAE_minority_only_categorical_encoder.json")
 
 # ===========================================
 # 🤖 方法 3: CTGAN 拒绝采样（Rejection Sampling）
@@ -219,7 +211,8 @@ print(f"   保留: {len(syn_ctgan_rejected)} 条")
 syn_ctgan_rejected.to_csv(f"{SAVE_DIR}/Sick_CTGAN_rejection_sampling.csv", index=False)
 print(f"   ✅ 已保存: {SAVE_DIR}/Sick_CTGAN_rejection_sampling.csv")
 
-f1_ctgan_rej, ba_ctgan_rej = evaluate_balanced_data("CTGAN (拒绝采样)", syn_ctgan_rejected)
+f1_ctgan_rej, ba_ctgan_rej = evaluate_balanced_data("CTGAN (拒绝采样)", syn_ctgan_rejected,
+                                                    f"{SAVE_DIR}/Sick_CTGAN_rejection_sampling_categorical_encoder.json")
 
 # ===========================================
 # 🤖 方法 4: TVAE 拒绝采样（Rejection Sampling）
@@ -251,7 +244,8 @@ if len(syn_tvae_rejected) < samples_needed:
 syn_tvae_rejected.to_csv(f"{SAVE_DIR}/Sick_TVAE_rejection_sampling.csv", index=False)
 print(f"   ✅ 已保存: {SAVE_DIR}/Sick_TVAE_rejection_sampling.csv")
 
-f1_tvae_rej, ba_tvae_rej = evaluate_balanced_data("TVAE (拒绝采样)", syn_tvae_rejected)
+f1_tvae_rej, ba_tvae_rej = evaluate_balanced_data("TVAE (拒绝采样)", syn_tvae_rejected,
+                                                  f"{SAVE_DIR}/Sick_TVAE_rejection_sampling_categorical_encoder.json")
 
 # ===========================================
 # 📊 最终总结
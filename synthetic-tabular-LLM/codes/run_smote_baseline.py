@@ -4,6 +4,7 @@ from imblearn.over_sampling import SMOTENC
 from xgboost import XGBClassifier
 from sklearn.metrics import f1_score, classification_report
 from sklearn.preprocessing import LabelEncoder
+from dataset_loader import load_realdata
 import warnings
 
 # 忽略警告
@@ -15,10 +16,9 @@ DATA_DIR = '../data/realdata/Sick'
 
 print("🚀 [1/5] 正在读取原始数据...")
 try:
-    X_train = pd.read_csv(f'{DATA_DIR}/X_train.csv', index_col=0)
-    y_train = pd.read_csv(f'{DATA_DIR}/y_train.csv', index_col=0).values.ravel()
-    X_test = pd.read_csv(f'{DATA_DIR}/X_test.csv', index_col=0)
-    y_test = pd.read_csv(f'{DATA_DIR}/y_test.csv', index_col=0).values.ravel()
+    X_train, y_train, X_test, y_test = load_realdata(DATA_DIR)
+    y_train = y_train.values.ravel()
+    y_test = y_test.values.ravel()
 except FileNotFoundError:
     print("❌ 错误：找不到数据文件！请检查 DATA_DIR 路径。")
     exit()
@@ -10,6 +10,7 @@ from sdv.metadata import SingleTableMetadata
 from xgboost import XGBClassifier
 from sklearn.metrics import f1_score, balanced_accuracy_score
 from sklearn.preprocessing import LabelEncoder
+from dataset_loader import load_realdata
 
 warnings.filterwarnings('ignore')
 
@@ -26,10 +27,8 @@ print("=" * 60)
 
 # 1. 读取数据
 print("\n[1/6] 正在读取数据...")
-X_train = pd.read_csv(f'{DATA_DIR}/X_train.csv', index_col=0)
-y_train = pd.read_csv(f'{DATA_DIR}/y_train.csv', index_col=0)
-X_test = pd.read_csv(f'{DATA_DIR}/X_test.csv', index_col=0)
-y_test = pd.read_csv(f'{DATA_DIR}/y_test.csv', index_col=0).values.ravel()
+X_train, y_train, X_test, y_test = load_realdata(DATA_DIR)
+y_test = y_test.values.ravel()
 
 print(f"   训练集: {X_train.shape[0]} 条, 测试集: {X_test.shape[0]} 条")
 print(f"   类别分布: {dict(pd.Series(y_train[TARGET_COLUMN]).value_counts())}")
@@ -4,6 +4,7 @@ import sys
 from sdv.single_table import CTGANSynthesizer
 from sdv.metadata import SingleTableMetadata
 from sdv.sampling import Condition
+from dataset_loader import read_table
 
 print("=" * 60)
 print("测试 CTGAN 条件采样功能")
@@ -12,8 +13,8 @@ print("=" * 60)
 # 读取数据
 print("\n1. 读取数据...")
 DATA_DIR = '../data/realdata/Sick'
-X_train = pd.read_csv(f'{DATA_DIR}/X_train.csv', index_col=0)
-y_train = pd.read_csv(f'{DATA_DIR}/y_train.csv', index_col=0)
+X_train = read_table(f'{DATA_DIR}/X_train.csv')
+y_train = read_table(f'{DATA_DIR}/y_train.csv')
 train_data = pd.concat([X_train, y_train], axis=1)
 
 print(f"   训练数据: {train_data.shape}")
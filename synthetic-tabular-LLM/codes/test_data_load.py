@@ -1,6 +1,7 @@
 """测试数据加载"""
 import pandas as pd
 import sys
+from dataset_loader import load_realdata
 
 DATA_DIR = '../data/realdata/travel'
 
@@ -10,10 +11,7 @@ print("=" * 60)
 
 try:
     print("\n正在读取数据...")
-    X_train = pd.read_csv(f'{DATA_DIR}/X_train.csv', index_col=0)
-    y_train = pd.read_csv(f'{DATA_DIR}/y_train.csv', index_col=0)
-    X_test = pd.read_csv(f'{DATA_DIR}/X_test.csv', index_col=0)
-    y_test = pd.read_csv(f'{DATA_DIR}/y_test.csv', index_col=0)
+    X_train, y_train, X_test, y_test = load_realdata(DATA_DIR)
     
     print(f"✅ X_train: {X_train.shape}")
     print(f"✅ y_train: {y_train.shape}")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+CODES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# 与各脚本的导入方式一致：codes/ 与 SyntheticDataGeneration/ 下的模块按顶层模块导入
+sys.path.insert(0, CODES_DIR)
+sys.path.insert(0, os.path.join(CODES_DIR, 'SyntheticDataGeneration'))
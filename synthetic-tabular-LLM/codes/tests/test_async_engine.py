@@ -0,0 +1,123 @@
+import asyncio
+
+import async_engine
+from async_engine import AsyncGenerationEngine, NonRetryableError
+
+
+class Prompt:
+    def __init__(self, text):
+        self.text = text
+
+
+def make_batch():
+    return [Prompt(f'prompt {i}') for i in range(4)], [{'i': i} for i in range(4)]
+
+
+class StubChain:
+    """记录同时在途的请求数；fail(job_id, attempt) 返回要抛出的异常（或 None）"""
+
+    def __init__(self, delay=0.01, fail=None):
+        self.delay = delay
+        self.fail = fail
+        self.inflight = 0
+        self.max_inflight = 0
+        self.calls = []
+
+    async def ainvoke(self, inputs, config=None):
+        job_id = config['metadata']['job_id']
+        attempt = sum(1 for j in self.calls if j == job_id)
+        self.calls.append(job_id)
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.inflight -= 1
+        exc = self.fail(job_id, attempt) if self.fail else None
+        if exc is not None:
+            raise exc
+        return f"response {job_id}"
+
+
+def test_concurrency_cap():
+    chain = StubChain()
+    engine = AsyncGenerationEngine(chain, make_batch, lambda job, text: 1, 40, max_concurrency=5, adaptive=False)
+    assert engine.run() == 40
+    assert chain.max_inflight == 5
+    assert engine.n_requests == 40 and engine.n_failed == 0
+
+
+def test_retry_with_backoff(monkeypatch):
+    backoffs = []
+    sleep = asyncio.sleep
+
+    async def record_sleep(seconds):
+        # StubChain 自身的 sleep(0) 不算退避
+        if seconds:
+            backoffs.append(seconds)
+        await sleep(0)
+
+    chain = StubChain(delay=0, fail=lambda job_id, attempt: ConnectionError('reset') if attempt < 2 else None)
+    engine = AsyncGenerationEngine(chain, make_batch, lambda job, text: 1, 1, max_concurrency=1,
+                                   retry_backoff=3.0, adaptive=False)
+    monkeypatch.setattr(async_engine.asyncio, 'sleep', record_sleep)
+    engine.run()
+    # 同一请求重试两次后成功，退避按 retry_backoff ** attempt 增长
+    assert len(set(chain.calls)) == 1 and len(chain.calls) == 3
+    assert backoffs == [3.0, 9.0]
+    assert engine.n_failed == 0 and engine.n_accepted == 1
+
+
+def test_failures_are_recorded():
+    errors = []
+    responses = []
+
+    def fail(job_id, attempt):
+        if job_id % 4 == 0:
+            return NonRetryableError('cache miss')
+        if job_id % 4 == 1:
+            return ConnectionError('down')
+        return None
+
+    def on_response(job, text):
+        responses.append(job.job_id)
+        return 1
+
+    chain = StubChain(delay=0, fail=fail)
+    engine = AsyncGenerationEngine(chain, make_batch, on_response, 6, max_concurrency=1, max_retries=2,
+                                   retry_backoff=0, on_error=lambda job, exc: errors.append((job.job_id, exc)),
+                                   adaptive=False)
+    assert engine.run() == 6
+    failed = {job_id for job_id, _ in errors}
+    assert failed
+    assert engine.n_failed == len(errors) == len(failed)
+    assert not failed & set(responses)
+    # 不可重试的错误只请求一次；其余错误重试 max_retries 次
+    for job_id, exc in errors:
+        expected = 1 if isinstance(exc, NonRetryableError) else 3
+        assert chain.calls.count(job_id) == expected
+
+
+def test_consecutive_failures_stop_the_run():
+    chain = StubChain(delay=0, fail=lambda job_id, attempt: ConnectionError('quota exhausted'))
+    engine = AsyncGenerationEngine(chain, make_batch, lambda job, text: 1, 100, max_concurrency=1,
+                                   max_retries=0, max_consecutive_failures=3, adaptive=False)
+    assert engine.run() == 0
+    assert engine.n_failed == 3 and engine.is_done()
+
+
+def test_inflight_requests_cancelled_when_target_reached():
+    class SlowAfterFirst(StubChain):
+        async def ainvoke(self, inputs, config=None):
+            self.delay = 0 if not self.calls else 30
+            return await super().ainvoke(inputs, config)
+
+    chain = SlowAfterFirst()
+    engine = AsyncGenerationEngine(chain, make_batch, lambda job, text: 10, 10, max_concurrency=4, adaptive=False)
+
+    async def run():
+        return await asyncio.wait_for(engine.arun(), timeout=5)
+
+    assert asyncio.run(run()) == 10
+    assert engine.n_requests == 1
+    assert engine.n_cancelled == 3 and chain.inflight == 0
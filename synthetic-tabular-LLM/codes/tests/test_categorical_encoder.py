@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from categorical_encoder import UNKNOWN, CategoricalEncoder
+
+
+def _frames():
+    train = pd.DataFrame({'sex': ['M', 'F', 'F'], 'source': ['SVI', 'other', np.nan], 'age': [30, 41, 52]})
+    syn = pd.DataFrame({'sex': ['F', 'M'], 'source': ['STMW', 'SVI'], 'age': [33, 60]})
+    return train, syn
+
+
+def test_codes_follow_sorted_vocabulary():
+    train, syn = _frames()
+    encoder = CategoricalEncoder().fit(['sex', 'source'], train, syn)
+    out = encoder.transform(train)
+    # 与 LabelEncoder 一致：按字符串排序，NaN 记为 'nan'
+    assert out['sex'].tolist() == [1, 0, 0]
+    assert out['source'].tolist() == [1, 3, 2]
+    assert out['sex'].dtype == np.int32
+    assert out['age'].tolist() == [30, 41, 52]
+
+
+def test_unseen_values_become_unknown():
+    train, syn = _frames()
+    encoder = CategoricalEncoder().fit(['source'], train)
+    out = encoder.transform(syn)
+    assert out['source'].tolist() == [UNKNOWN, encoder.vocabularies['source'].get_loc('SVI')]
+    assert encoder.n_unknown(syn) == {'source': 1}
+
+
+def test_codes_do_not_depend_on_earlier_fits():
+    train, syn = _frames()
+    other = pd.DataFrame({'sex': ['?', 'A'], 'source': ['AAA', 'ZZZ'], 'age': [1, 2]})
+    CategoricalEncoder().fit(['sex', 'source'], train, other)
+    alone = CategoricalEncoder().fit(['sex', 'source'], train, syn).transform(train)
+    again = CategoricalEncoder().fit(['sex', 'source'], train, syn).transform(train)
+    pd.testing.assert_frame_equal(alone, again)
+
+
+def test_save_load_round_trip(tmp_path):
+    train, syn = _frames()
+    encoder = CategoricalEncoder().fit(['sex', 'source'], train, syn)
+    path = str(tmp_path / 'Sick_CTGAN_categorical_encoder.json')
+    encoder.save(path)
+    loaded = CategoricalEncoder.load(path)
+
+    assert loaded.columns == encoder.columns
+    pd.testing.assert_frame_equal(loaded.transform(syn), encoder.transform(syn))
+    # 原子写入：不留下临时文件
+    assert os.listdir(tmp_path) == ['Sick_CTGAN_categorical_encoder.json']
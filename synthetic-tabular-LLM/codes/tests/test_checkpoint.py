@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from checkpoint import GenerationCheckpoint
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=['age', 'Class'])
+
+
+def test_resume_restores_committed_batches(tmp_path):
+    path = str(tmp_path / 'Sick_checkpoint.jsonl')
+    ckpt = GenerationCheckpoint(path)
+    ckpt.start({'DATA_NAME': 'Sick', 'mapper_seed': 3})
+    ckpt.append_batch('p0', 'r0', _frame([[30, 'sick']]), _frame([[31, 'sick'], [32, 'negative']]),
+                      endpoint='a', cache_key='k0')
+    ckpt.append_batch('p1', 'garbage', error='No valid rows', cache_key='k1')
+
+    resumed = GenerationCheckpoint(path)
+    state = resumed.load()
+    assert resumed.n_batches == 2
+    assert state['meta']['mapper_seed'] == 3
+    first, second = state['batches']
+    pd.testing.assert_frame_equal(first['rows'], _frame([[31, 'sick'], [32, 'negative']]))
+    assert first['endpoint'] == 'a' and first['cache_key'] == 'k0'
+    assert second['error'] == 'No valid rows' and second['rows'] is None and second['cache_key'] == 'k1'
+
+    # 续跑追加的批次接着编号
+    resumed.append_batch('p2', 'r2', _frame([[30, 'sick']]), _frame([[33, 'sick']]), cache_key='k2')
+    batches = GenerationCheckpoint(path).load()['batches']
+    assert [b['seq'] for b in batches] == [0, 1, 2]
+
+
+def test_float_values_round_trip(tmp_path):
+    path = str(tmp_path / 'Sick_checkpoint.jsonl')
+    ckpt = GenerationCheckpoint(path)
+    ckpt.start({'DATA_NAME': 'Sick'})
+    rows = pd.DataFrame({'TSH': [0.1234567890123, 1.5e-7, 123456.789012345], 'Class': ['sick'] * 3})
+    ckpt.append_batch('p0', 'r0', rows, rows)
+
+    restored = GenerationCheckpoint(path).load()['batches'][0]
+    assert restored['rows']['TSH'].tolist() == rows['TSH'].tolist()
+    pd.testing.assert_frame_equal(restored['input_rows'], rows)
+
+
+def test_half_written_last_line_is_truncated(tmp_path):
+    path = str(tmp_path / 'Sick_checkpoint.jsonl')
+    ckpt = GenerationCheckpoint(path)
+    ckpt.start({'DATA_NAME': 'Sick'})
+    ckpt.append_batch('p0', 'r0', _frame([[30, 'sick']]), _frame([[31, 'sick']]))
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "batch", "seq": 1, "prompt": "p1", "resp')
+
+    resumed = GenerationCheckpoint(path)
+    assert len(resumed.load()['batches']) == 1
+    with open(path, encoding='utf-8') as f:
+        lines = f.readlines()
+    assert len(lines) == 2 and lines[-1].endswith('\n')
+
+    resumed.append_batch('p1', 'r1', _frame([[30, 'sick']]), _frame([[32, 'sick']]))
+    batches = GenerationCheckpoint(path).load()['batches']
+    assert [b['prompt'] for b in batches] == ['p0', 'p1']
+    assert [b['seq'] for b in batches] == [0, 1]
+
+
+def test_load_without_meta_raises(tmp_path):
+    path = tmp_path / 'Sick_checkpoint.jsonl'
+    path.write_text('{"type": "batch"', encoding='utf-8')
+    with pytest.raises(ValueError):
+        GenerationCheckpoint(str(path)).load()
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from class_quota import ClassQuotaScheduler, balance_quotas
+
+CLASSES = ['negative', 'sick', 'other']
+
+
+def _rows(labels):
+    return pd.DataFrame({'Class': labels, 'age': range(len(labels))})
+
+
+def test_balance_quotas():
+    labels = ['negative'] * 10 + ['sick'] * 3 + ['other'] * 6
+    assert balance_quotas(labels) == {'sick': 7, 'other': 4}
+    assert balance_quotas(['a', 'b']) == {}
+
+
+def test_unknown_quota_class_raises():
+    with pytest.raises(ValueError):
+        ClassQuotaScheduler('Class', {'healthy': 3}, CLASSES)
+
+
+def test_accept_trims_to_remaining_quota():
+    quota = ClassQuotaScheduler('Class', {'sick': 3, 'other': 1}, CLASSES)
+    accepted = quota.accept(_rows(['sick', 'negative', 'other', 'sick', 'other', 'sick', 'sick']))
+    # 多数类整行丢弃，每类按出现顺序取到剩余配额为止
+    assert accepted['age'].tolist() == [0, 2, 3, 5]
+    assert quota.counts == {'sick': 3, 'other': 1}
+    assert quota.is_done()
+    assert len(quota.accept(_rows(['sick', 'other']))) == 0
+
+
+def test_accept_across_batches():
+    quota = ClassQuotaScheduler('Class', {'sick': 3}, CLASSES)
+    assert len(quota.accept(_rows(['sick', 'sick']))) == 2
+    assert quota.remaining('sick') == 1
+    assert quota.accept(_rows(['sick', 'sick', 'sick']))['age'].tolist() == [0]
+    assert quota.remaining('sick') == 0 and quota.is_done()
+    assert quota.accept(_rows([])).empty
+
+
+def test_slot_classes_reassigned_when_class_fills():
+    quota = ClassQuotaScheduler('Class', {'sick': 2, 'other': 5}, CLASSES)
+    # 两个未满额类别轮流占用槽位（ClassRowIndex 中的位置）
+    assert quota.slot_classes(4) == [1, 2, 1, 2]
+    quota.accept(_rows(['sick', 'sick']))
+    assert quota.slot_classes(4) == [2, 2, 2, 2]
+    quota.accept(_rows(['other'] * 5))
+    # 全部满额后退回所有配额类别，避免生成空 prompt
+    assert quota.is_done()
+    assert quota.slot_classes(3) == [1, 2, 1]
+
+
+def test_count_restores_state_on_resume():
+    quota = ClassQuotaScheduler('Class', {'sick': 4}, CLASSES)
+    quota.count(_rows(['sick', 'negative', 'sick']))
+    assert quota.remaining('sick') == 2
+    assert quota.n_target == 4
+    assert quota.summary({'sick': 'Sick'}) == 'Sick: 2/4'
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset_loader
+from dataset_loader import CACHE_DIRNAME, load_realdata, read_table
+
+
+def _write(path, text, mtime_ns=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_matches_read_csv_and_sets_index(tmp_path):
+    path = str(tmp_path / 'X_train.csv')
+    _write(path, 'index,age,sex,source\n3,41.5,F,SVI\n7,,M,\n9,60.0,,other\n')
+    expected = pd.read_csv(path, index_col=0)
+
+    first = read_table(path)
+    second = read_table(path)
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+    assert os.path.isdir(tmp_path / CACHE_DIRNAME / 'X_train.csv')
+
+
+def test_index_column_detection(tmp_path):
+    _write(tmp_path / 'samples.csv', 'synindex,Class,age\n0,sick,30\n1,negative,40\n')
+    _write(tmp_path / 'minority.csv', 'age,Class\n30,sick\n40,sick\n')
+    assert read_table(tmp_path / 'samples.csv').index.name == 'synindex'
+    plain = read_table(tmp_path / 'minority.csv')
+    assert isinstance(plain.index, pd.RangeIndex)
+    assert list(plain.columns) == ['age', 'Class']
+
+
+def test_cache_hit_touch_and_content_change(tmp_path, monkeypatch):
+    path = str(tmp_path / 'y_train.csv')
+    _write(path, 'index,Class\n0,a\n1,b\n', mtime_ns=1_000_000_000)
+    read_table(path)
+
+    calls = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(dataset_loader.pd, 'read_csv', lambda *a, **k: calls.append(a) or read_csv(*a, **k))
+
+    # 未修改：直接读缓存
+    assert read_table(path)['Class'].tolist() == ['a', 'b']
+    # 只改了修改时间（例如 git checkout）：哈希相同，仍读缓存
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert read_table(path)['Class'].tolist() == ['a', 'b']
+    assert calls == []
+
+    # 大小不变但内容改变：重新解析并更新缓存
+    _write(path, 'index,Class\n0,c\n1,d\n', mtime_ns=3_000_000_000)
+    assert read_table(path)['Class'].tolist() == ['c', 'd']
+    assert len(calls) == 1
+    assert read_table(path)['Class'].tolist() == ['c', 'd']
+    assert len(calls) == 1
+
+
+def test_cache_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv('EPIC_TABLE_CACHE', '0')
+    path = str(tmp_path / 'X_test.csv')
+    _write(path, 'index,age\n0,1.5\n')
+    assert read_table(path)['age'].tolist() == [1.5]
+    assert not os.path.exists(tmp_path / CACHE_DIRNAME)
+
+
+def test_load_realdata_aligns_on_index(tmp_path):
+    for name, body in [('X_train', 'index,age\n5,30\n8,40\n'), ('y_train', 'index,Class\n5,a\n8,b\n'),
+                       ('X_test', 'index,age\n2,50\n'), ('y_test', 'index,Class\n2,a\n')]:
+        _write(tmp_path / f'{name}.csv', body)
+    X_train, y_train, X_test, y_test = load_realdata(str(tmp_path))
+    train = pd.concat([X_train, y_train], axis=1)
+    assert train.index.tolist() == [5, 8]
+    assert train.columns.tolist() == ['age', 'Class']
+    assert np.array_equal(y_test.values.ravel(), ['a'])
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from dedup_filter import RowDeduplicator
+
+
+def _real():
+    return pd.DataFrame({'age': [20.0, 40.0, 60.0, 80.0], 'sex': ['F', 'M', 'F', 'M'],
+                         'Class': ['sick', 'negative', 'negative', 'negative']})
+
+
+def _dedup():
+    return RowDeduplicator(_real(), ['sex', 'Class'], near_copy_threshold=0.0)
+
+
+def test_filter_drops_copies_and_in_batch_duplicates():
+    dedup = _dedup()
+    batch = pd.DataFrame({'age': [20.0, 33.0, 33.0, 51.0], 'sex': ['F', 'M', 'M', 'F'],
+                          'Class': ['sick', 'sick', 'sick', 'negative']})
+    kept = dedup.filter(batch)
+    assert kept.index.tolist() == [1, 3]
+    assert dedup.rejected['real_copy'] == 1 and dedup.rejected['duplicate'] == 1
+
+
+def test_only_saved_rows_count_as_seen():
+    dedup = _dedup()
+    row = pd.DataFrame({'age': [33.0], 'sex': ['M'], 'Class': ['sick']})
+
+    # 行通过去重检查，但随后被类别配额丢弃（未调用 add_seen）
+    assert len(dedup.filter(row)) == 1
+    assert len(dedup.filter(row)) == 1
+    assert dedup.rejected['duplicate'] == 0
+
+    dedup.add_seen(row)
+    assert len(dedup.filter(row)) == 0
+    assert dedup.rejected['duplicate'] == 1
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, parse_duration, parse_retry_after
+
+
+class FakeClock:
+    """替换 rate_limiter 中的 time.monotonic 与 asyncio.sleep：sleep 只推进时间并记录等待时长"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    monkeypatch.setattr(rate_limiter.asyncio, 'sleep', clock.sleep)
+    return clock
+
+
+def _acquire(limiter, n_tokens=0):
+    asyncio.run(limiter.acquire(n_tokens))
+
+
+def test_parse_duration_and_retry_after():
+    assert parse_duration('6m0s') == 360.0
+    assert parse_duration('20ms') == pytest.approx(0.02)
+    assert parse_duration('1.5s') == 1.5
+    assert parse_duration('12') == 12.0
+    assert parse_duration('soon') is None
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(None) is None
+
+
+def test_request_bucket_refills(clock):
+    limiter = RateLimiter(rpm=60)
+    for _ in range(60):
+        _acquire(limiter)
+    assert clock.sleeps == []
+
+    # 桶已空：每分钟 60 个，下一个请求需等 1 秒
+    _acquire(limiter)
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+    clock.now += 30
+    for _ in range(30):
+        _acquire(limiter)
+    assert len(clock.sleeps) == 1
+
+
+def test_token_bucket_caps_large_requests(clock):
+    limiter = RateLimiter(tpm=1200)
+    _acquire(limiter, 1000)
+    # 剩 200，再要 400 需补 200 个 token（每秒 20 个）
+    _acquire(limiter, 400)
+    assert clock.sleeps == [pytest.approx(10.0)]
+    # 超过整桶容量的请求只要求桶满
+    _acquire(limiter, 5000)
+    assert clock.sleeps[-1] == pytest.approx(1200 / 20)
+
+
+def test_retry_after_on_429(clock):
+    limiter = RateLimiter(rpm=600)
+    limiter.update_from_headers({'retry-after': '7'}, status_code=429)
+    assert limiter.n_throttled == 1
+    assert limiter.penalty_remaining() == pytest.approx(7.0)
+    _acquire(limiter)
+    assert clock.sleeps == [pytest.approx(7.0)]
+
+
+def test_429_without_retry_after_uses_reset_header(clock):
+    limiter = RateLimiter()
+    limiter.update_from_headers({'x-ratelimit-reset-requests': '1.5s'}, status_code=429)
+    _acquire(limiter)
+    assert clock.sleeps == [pytest.approx(1.5)]
+
+    limiter.update_from_headers({}, status_code=429)
+    _acquire(limiter)
+    assert clock.sleeps[-1] == pytest.approx(1.0)
+
+
+def test_headers_set_limit_and_sync_remaining(clock):
+    limiter = RateLimiter()
+    # 额度未知时不限流
+    _acquire(limiter)
+    assert clock.sleeps == []
+
+    limiter.update_from_headers({'x-ratelimit-limit-requests': '120', 'x-ratelimit-remaining-requests': '0',
+                                 'x-ratelimit-limit-tokens': '6000', 'x-ratelimit-remaining-tokens': '5000'})
+    assert limiter.requests.capacity == 120 and limiter.tokens.capacity == 6000
+    assert limiter.tokens.tokens == 5000
+    # 服务端剩余 0 个请求：每分钟 120 个，等 0.5 秒
+    _acquire(limiter, 100)
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+    # 等待的 0.5 秒内补充 50 个 token；剩余额度只向下校正
+    limiter.update_from_headers({'x-ratelimit-remaining-tokens': '9999'})
+    assert limiter.tokens.tokens == pytest.approx(5000 + 50 - 100)
+    limiter.update_from_headers({'x-ratelimit-remaining-tokens': '300'})
+    assert limiter.tokens.tokens == 300
+
+
+def test_bad_header_values_are_ignored(clock):
+    limiter = RateLimiter(rpm=60)
+    limiter.update_from_headers({'x-ratelimit-limit-requests': 'n/a', 'x-ratelimit-remaining-requests': 'n/a'})
+    assert limiter.requests.capacity == 60
+    assert limiter.penalty_remaining() == 0
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from async_engine import AsyncGenerationEngine
+from response_cache import CacheMissError, CachedChain, ResponseCache
+
+
+class Template:
+    def format(self, **inputs):
+        return f"rows: {inputs['rows']}"
+
+
+class Prompt:
+    def __init__(self, text):
+        self.text = text
+
+
+class FlakyChain:
+    """第奇数次调用失败，成功的响应按调用次序编号"""
+
+    def __init__(self, fail=True):
+        self.fail = fail
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        if self.fail and self.calls % 2 == 1:
+            raise ConnectionError('dropped')
+        return f"response {self.calls}"
+
+
+def _run(chain, n_jobs):
+    # 所有请求使用相同的输入，只能靠 sample_index 区分
+    def make_batch():
+        return [Prompt('rows: same')], [{'rows': 'same'}]
+
+    responses = []
+
+    def on_response(job, text):
+        responses.append((job.job_id, text, chain.take_key(job.job_id)))
+        return 1
+
+    engine = AsyncGenerationEngine(chain, make_batch, on_response, n_jobs, max_concurrency=1,
+                                   retry_backoff=0, adaptive=False)
+    engine.run()
+    return responses
+
+
+def test_replay_with_retries(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache'))
+    recorded = _run(CachedChain(FlakyChain(), Template(), cache, 'm', 0.7), 3)
+    assert [text for _, text, _ in recorded] == ['response 2', 'response 4', 'response 6']
+    # 失败的尝试不占 sample_index：三个请求各一个缓存条目
+    assert len(cache) == 3
+    assert len({key for _, _, key in recorded}) == 3
+
+    inner = FlakyChain(fail=False)
+    replayed = _run(CachedChain(inner, Template(), ResponseCache(str(tmp_path / 'cache')), 'm', 0.7,
+                                mode='replay'), 3)
+    assert inner.calls == 0
+    assert [text for _, text, _ in replayed] == [text for _, text, _ in recorded]
+
+
+def test_committed_keys_are_skipped(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache'))
+    recorded = _run(CachedChain(FlakyChain(fail=False), Template(), cache, 'm', 0.7), 3)
+    committed = [key for _, _, key in recorded[:2]]
+
+    inner = FlakyChain(fail=False)
+    resumed = CachedChain(inner, Template(), cache, 'm', 0.7, committed=committed)
+    assert asyncio.run(resumed.ainvoke({'rows': 'same'}, config={'metadata': {'job_id': 0}})) == 'response 3'
+    assert resumed.take_key(0) == recorded[2][2]
+    # 缓存里剩下的都已提交过，重新请求
+    assert asyncio.run(resumed.ainvoke({'rows': 'same'})) == 'response 1'
+    assert inner.calls == 1
+
+
+def test_replay_miss_raises(tmp_path):
+    chain = CachedChain(FlakyChain(fail=False), Template(), ResponseCache(str(tmp_path / 'cache')), 'm', 0.7,
+                        mode='replay')
+    with pytest.raises(CacheMissError):
+        asyncio.run(chain.ainvoke({'rows': 'new'}))
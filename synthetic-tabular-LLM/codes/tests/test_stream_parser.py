@@ -0,0 +1,81 @@
+import pandas as pd
+
+from stream_parser import StreamingRowParser
+from util import get_unique_features, parse_result
+
+COLUMNS = ['Class', 'age', 'sex', 'TSH']
+CATEGORICAL = ['Class', 'sex']
+NAME_COLS = ','.join(COLUMNS) + '\n'
+REAL = pd.DataFrame({'Class': ['sick', 'negative'], 'age': [41, 60], 'sex': ['F', 'M'], 'TSH': [1.3, 0.25]})
+UNIQUE = get_unique_features(REAL, CATEGORICAL)
+
+RESPONSE = (
+    "Here are the samples:\n"
+    "```csv\n"
+    f"{NAME_COLS}"
+    "sick,33,F,1.5\n"
+    "negative,71,M,0.02\n"
+    f"{NAME_COLS}"
+    "healthy,50,F,2.0\n"
+    "negative,44,X,0.7\n"
+    "unknown,52,Z,0.9\n"
+    "sick,,M,3.1\n"
+    "sick,29,M\n"
+    "negative,38,F,0.4\n"
+    "```\n"
+)
+
+
+def _parser(**kwargs):
+    return StreamingRowParser(COLUMNS, CATEGORICAL, UNIQUE, numeric_columns=['age', 'TSH'], name_cols=NAME_COLS,
+                              **kwargs)
+
+
+def _stream(text, size, **kwargs):
+    parser = _parser(**kwargs)
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    parser.close()
+    return parser
+
+
+def test_rows_split_across_chunks():
+    expected = _stream(RESPONSE, len(RESPONSE)).to_frame()
+    assert expected.values.tolist() == [['sick', 33, 'F', 1.5], ['negative', 71, 'M', 0.02],
+                                        ['negative', 38, 'F', 0.4]]
+    for size in (1, 3, 7, 16):
+        pd.testing.assert_frame_equal(_stream(RESPONSE, size).to_frame(), expected)
+
+
+def test_fences_and_repeated_headers_are_skipped():
+    parser = _stream(RESPONSE, 5)
+    # 说明文字、``` 与两次表头都不算作行
+    assert parser.rejected['column_count'] == 2
+    assert parser.rejected['missing'] == 1
+
+
+def test_last_line_without_newline():
+    parser = _parser()
+    parser.feed(f"{NAME_COLS}sick,33,F,1.5\nnegative,71,M,0.0")
+    assert parser.n_rows == 1
+    parser.close()
+    assert parser.to_frame()['TSH'].tolist() == [1.5, 0.0]
+
+
+def test_reject_counts_match_parse_result():
+    report = {}
+    expected = parse_result(RESPONSE, NAME_COLS, COLUMNS, CATEGORICAL, UNIQUE, report=report)
+    parser = _stream(RESPONSE, 4)
+
+    assert parser.to_frame().values.tolist() == expected.values.tolist()
+    for column in CATEGORICAL:
+        assert parser.rejected[column] == report.get(column, 0)
+    assert report == {'Class': 2, 'sex': 2}
+
+
+def test_stops_at_max_rows():
+    parser = _parser(max_rows=2)
+    parser.feed(RESPONSE[:RESPONSE.index('healthy')])
+    assert parser.should_stop()
+    parser.feed("negative,38,F,0.4\n")
+    assert parser.n_rows == 2 and parser.rejected['surplus'] == 1
@@ -4,6 +4,7 @@
 
 import pandas as pd
 from pathlib import Path
+from dataset_loader import read_table
 
 # 配置路径
 BALANCED_DIR = Path('../data/balanced_datasets')
@@ -58,7 +59,7 @@ def verify_dataset(dataset_name, config):
             continue
         
         # 读取数据
-        df = pd.read_csv(filepath)
+        df = read_table(filepath)
         
         # 统计信息
         total_samples = len(df)
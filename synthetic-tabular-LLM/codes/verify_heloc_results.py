@@ -3,6 +3,7 @@
 """
 import pandas as pd
 import os
+from dataset_loader import read_table
 
 print("=" * 80)
 print("🔍 HELOC 数据集生成结果验证")
@@ -22,9 +23,7 @@ files_to_check = [
 ]
 
 # 加载原始训练数据
-y_train = pd.read_csv('../data/realdata/HELOC/y_train.csv')
-if 'index' in y_train.columns:
-    y_train = y_train.drop('index', axis=1)
+y_train = read_table('../data/realdata/HELOC/y_train.csv')
 
 print("\n📊 原始训练集类别分布:")
 original_counts = y_train[target_column].value_counts()
@@ -46,7 +45,7 @@ for filename, description in files_to_check:
     filepath = os.path.join(syndata_path, filename)
     
     if os.path.exists(filepath):
-        df = pd.read_csv(filepath)
+        df = read_table(filepath)
         
         print(f"\n✅ {description}")
         print(f"   文件: {filename}")
@@ -1,6 +1,7 @@
 """验证生成的少数类样本文件"""
 import pandas as pd
 import os
+from dataset_loader import read_table
 
 base_dir = '../data/syndata'
 
@@ -18,7 +19,7 @@ sick_files = [
 for f in sick_files:
     path = os.path.join(base_dir, f)
     if os.path.exists(path):
-        df = pd.read_csv(path)
+        df = read_table(path)
         print(f"\n✅ {f}:")
         print(f"   样本数: {len(df)} 条")
         print(f"   类别分布: {dict(df['Class'].value_counts())}")
@@ -39,7 +40,7 @@ travel_files = [
 for f in travel_files:
     path = os.path.join(base_dir, f)
     if os.path.exists(path):
-        df = pd.read_csv(path)
+        df = read_table(path)
         print(f"\n✅ {f}:")
         print(f"   样本数: {len(df)} 条")
         print(f"   类别分布: {dict(df['Target'].value_counts())}")